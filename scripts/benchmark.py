@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""benchmark.py
+
+Offline benchmarks for earn_achievements.py and generate_stats_page.py.
+
+Every scenario runs in a fresh child process with its own HOME, against a local
+stand-in for the GitHub API (an HTTP server serving generated fixtures) and a fake
+`gh` binary on PATH that forwards `gh api` calls to that server. For each scenario
+it reports wall time, API requests served, `gh` processes spawned and peak RSS.
+
+Usage:
+  benchmark.py                          # Run every scenario
+  benchmark.py --scenario status-1-user --latency 50
+  benchmark.py --save-baseline benchmarks/baseline.json
+  benchmark.py --compare benchmarks/baseline.json  # Exit 1 on a regression
+  benchmark.py --compare --counts-only             # What CI checks
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = SCRIPTS_DIR.parent / "benchmarks" / "baseline.json"
+VIEWER = "bench"
+BIG_USER = "bigrepos"
+SEED_REPO = f"{VIEWER}/achievements"
+# Resource -> requests per hour the mock advertises in x-ratelimit-* headers
+MOCK_LIMITS = {"core": 5000, "search": 5000, "graphql": 5000}
+
+FAKE_GH = '''#!{python}
+"""Fake gh for benchmarks: forwards `gh api` to the mock server and logs every call.
+
+The mock never sends Link headers, so --paginate needs no special handling.
+"""
+import http.client
+import json
+import os
+import sys
+import urllib.parse
+
+sys.path.insert(0, {scripts!r})
+args = sys.argv[1:]
+with open(os.environ["FAKE_GH_LOG"], "a") as log:
+    log.write(json.dumps(args) + "\\n")
+if args[:1] == ["--version"]:
+    print("gh version 0.0.0 (benchmark)")
+elif args[:2] == ["auth", "token"]:
+    print(os.environ.get("GH_TOKEN", "benchmark-token"))
+elif args[:2] in (["label", "create"], ["issue", "create"]):
+    print("https://github.com/{{}}/issues/1".format(args[args.index("--repo") + 1]))
+elif args[:1] == ["api"]:
+    from earn_achievements import parse_api_args
+
+    include = "--include" in args
+    spec = parse_api_args(args)
+    base = urllib.parse.urlsplit(os.environ["GITHUB_API_URL"])
+    conn = http.client.HTTPConnection(base.hostname, base.port)
+    conn.request(spec["method"], spec["path"], body=spec["body"], headers=spec["headers"])
+    resp = conn.getresponse()
+    body = resp.read().decode()
+    if include:
+        print("HTTP/1.1 {{}} {{}}".format(resp.status, resp.reason), end="\\r\\n")
+        for name, value in resp.getheaders():
+            print("{{}}: {{}}".format(name, value), end="\\r\\n")
+        print(end="\\r\\n")
+    print(body)
+    if resp.status >= 400:
+        print("gh: HTTP {{}}".format(resp.status), file=sys.stderr)
+        sys.exit(1)
+else:
+    print("fake gh: unsupported command: " + " ".join(args), file=sys.stderr)
+    sys.exit(1)
+'''
+
+
+def stable_number(*parts: str, modulo: int = 200) -> int:
+    return int(hashlib.sha1("/".join(parts).encode()).hexdigest()[:8], 16) % modulo
+
+
+def build_fixtures(users: int = 1, big_repos: int = 5000, repos_per_user: int = 30) -> Dict:
+    """Deterministic fake GitHub data: the viewer, `users` other accounts and one user with many repos."""
+    logins = [VIEWER] + [f"user{i:04d}" for i in range(1, users)] + [BIG_USER]
+    fixtures: Dict = {"users": {}, "issues": {SEED_REPO: [
+        {"title": "Pull Shark: find 2 good starter issues", "pull_request": None},
+        {"title": "YOLO: merge a PR without review", "pull_request": None},
+        {"title": "Some unrelated PR", "pull_request": {}},
+    ]}}
+    for login in logins:
+        count = big_repos if login == BIG_USER else repos_per_user
+        repos = [{"name": f"repo{i}", "stargazers_count": stable_number(login, str(i), modulo=7),
+                  "visibility": "public" if i % 5 else "private", "fork": i % 11 == 0} for i in range(count)]
+        fixtures["users"][login] = {
+            "profile": {"login": login, "public_repos": sum(1 for r in repos if r["visibility"] == "public"),
+                        "followers": stable_number(login, "followers"), "following": stable_number(login, "following"),
+                        "public_gists": stable_number(login, "gists", modulo=10)},
+            "repos": repos,
+        }
+    return fixtures
+
+
+class MockGitHub:
+    """Threaded local HTTP server answering the REST and GraphQL calls the scripts make.
+
+    `latency` seconds are added to every response and every `throttle_every`-th
+    request gets a 429. Pagination depth follows the fixture sizes.
+    """
+
+    def __init__(self, fixtures: Dict, viewer: str = VIEWER, latency: float = 0.0, throttle_every: int = 0) -> None:
+        self.fixtures = fixtures
+        self.viewer = viewer
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.requests = 0
+        self.used: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "MockGitHub":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this, delayed ACKs add ~40 ms a request.
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                self._reply(*mock.route("GET", self.path, None), self.headers.get("If-None-Match"))
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._reply(*mock.route("POST", self.path, body), None)
+
+            def _reply(self, status, payload, headers, etag_match):
+                if mock.latency:
+                    time.sleep(mock.latency)
+                body = json.dumps(payload).encode()
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if status == 200 and etag_match == etag:
+                    status, body = 304, b""
+                self.send_response(status)
+                for name, value in {**headers, "ETag": etag, "Content-Length": str(len(body))}.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def route(self, method: str, path: str, body: Optional[bytes]):
+        parts = urllib.parse.urlsplit(path)
+        query = dict(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+        resource = "search" if parts.path.startswith("/search") else "graphql" if parts.path == "/graphql" else "core"
+        with self.lock:
+            self.requests += 1
+            throttled = self.throttle_every and self.requests % self.throttle_every == 0
+            self.used[resource] = self.used.get(resource, 0) + 1
+            remaining = max(0, MOCK_LIMITS[resource] - self.used[resource])
+        headers = {"x-ratelimit-resource": resource, "x-ratelimit-limit": str(MOCK_LIMITS[resource]),
+                   "x-ratelimit-remaining": str(remaining), "x-ratelimit-reset": str(int(time.time()) + 3600)}
+        if throttled:
+            return 429, {"message": "API rate limit exceeded"}, {**headers, "Retry-After": "0"}
+
+        users = self.fixtures["users"]
+        match = re.fullmatch(r"/users/([^/]+)(/[a-z]+)?", parts.path)
+        if method == "POST" and parts.path == "/graphql":
+            return 200, self.graphql(json.loads(body or b"{}")), headers
+        if parts.path == "/user":
+            return 200, users[self.viewer]["profile"], headers
+        if parts.path == "/search/issues":
+            return 200, {"total_count": stable_number(query.get("q", "")), "incomplete_results": False,
+                         "items": []}, headers
+        if match and match.group(1) in users:
+            user = users[match.group(1)]
+            if not match.group(2):
+                return 200, user["profile"], headers
+            if match.group(2) == "/repos":
+                # Like the real endpoint, only public repos are listed for another user.
+                return self.page([r for r in user["repos"] if r["visibility"] == "public"], query, headers)
+            if match.group(2) in ("/events", "/gists"):
+                return self.page([], query, headers)
+        issues = re.fullmatch(r"/repos/([^/]+/[^/]+)/issues", parts.path)
+        if issues and method == "GET":
+            return self.page(self.fixtures["issues"].get(issues.group(1), []), query, headers)
+        members = re.fullmatch(r"/orgs/[^/]+/members", parts.path)
+        if members:
+            return self.page([{"login": login} for login in users], query, headers)
+        return 404, {"message": "Not Found"}, headers
+
+    def page(self, items: List, query: Dict[str, str], headers: Dict[str, str]):
+        per_page = min(int(query.get("per_page") or 30), 100)
+        page = int(query.get("page") or 1)
+        return 200, items[(page - 1) * per_page:page * per_page], headers
+
+    def graphql(self, request: Dict) -> Dict:
+        """Answer the aliased queries built by build_graphql_query (and STARS_PAGE_QUERY)."""
+        query = request.get("query", "")
+        variables = request.get("variables", {})
+        if "search(query: $q" in query:
+            # Merged PRs for the co-author trailer scan: none carry trailers here.
+            return {"data": {"search": {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}}}
+        user = self.fixtures["users"].get(variables.get("login"))
+        if user is None:
+            return {"data": {"user": None}}
+        if "pullRequests(first" in query:
+            # The Quickdraw/YOLO scan: no issues or PRs in the fixtures.
+            empty = {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}
+            return {"data": {"user": {name: empty for name in ("issues", "pullRequests") if f"{name}(first" in query}}}
+        profile, repos = user["profile"], user["repos"]
+        data: Dict = {}
+        fields: Dict = {}
+        for alias in re.findall(r"(\w+): search\(", query):
+            data[alias] = {"issueCount": stable_number(variables.get(alias, ""))}
+        counts = {"followers": profile["followers"], "following": profile["following"],
+                  "public_repos": profile["public_repos"], "gists": profile["public_gists"],
+                  "accepted_answers": stable_number(profile["login"], "answers", modulo=40)}
+        for alias, count in counts.items():
+            if re.search(rf"\b{alias}: ", query):
+                fields[alias] = {"totalCount": count}
+        if "total_stars: " in query:
+            public = [r for r in repos if r["visibility"] == "public"]
+            start = int(variables.get("cursor") or 0)
+            chunk = public[start:start + 100]
+            fields["total_stars"] = {
+                "nodes": [{"stargazerCount": r["stargazers_count"]} for r in chunk],
+                "pageInfo": {"hasNextPage": start + 100 < len(public), "endCursor": str(start + 100)},
+            }
+        if "year_contributions: " in query:
+            total = stable_number(profile["login"], "contributions", modulo=2000)
+            fields["year_contributions"] = {"contributionCalendar": {"totalContributions": total}}
+        data["user"] = fields
+        return {"data": data}
+
+
+class Scenario(NamedTuple):
+    name: str
+    description: str
+    users: int
+    viewer: str
+    argv: List[str]
+
+
+SCENARIOS = [
+    Scenario("status-1-user", "status over the HTTP transport", 1, VIEWER, ["--transport", "http", "status"]),
+    Scenario("status-1-user-gh", "status with one gh process per request", 1, VIEWER, ["--transport", "gh", "status"]),
+    Scenario("status-100-users", "batch status for 100 users", 100, VIEWER,
+             ["--transport", "http", "status", "--users-file", "{users_file}"]),
+    Scenario("status-5000-repos", "status for a user with --big-repos repos (REST)", 1, BIG_USER,
+             ["--transport", "http", "status", "--source", "rest"]),
+    Scenario("seed", "seed issues into a repo that has some already", 1, VIEWER, ["--transport", "http", "seed"]),
+    Scenario("stats-page", "generate_stats_page.py for one user", 1, VIEWER, ["@stats-page"]),
+    Scenario("stats-page-100-users", "per-user pages and leaderboard for 100 users", 100, VIEWER,
+             ["@stats-page", "--users-file", "{users_file}", "--leaderboard"]),
+]
+
+
+def run_child(scenario: Scenario, home: Path) -> Dict:
+    """Run one scenario in this process (the child) and return its timing and memory."""
+    import resource
+
+    users_file = home / "users.txt"
+    argv = [arg.format(users_file=users_file) for arg in scenario.argv]
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    import earn_achievements as ea
+
+    ea.save_config({**ea.load_config(), "repo": SEED_REPO})
+    with open(os.devnull, "w") as devnull:
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout = sys.stderr = devnull
+        start = time.perf_counter()
+        try:
+            if argv[0] == "@stats-page":
+                import generate_stats_page
+
+                generate_stats_page.main(argv[1:] + ["--output-dir", str(home / "docs")])
+                result = 0
+            else:
+                sys.argv = ["earn_achievements.py"] + argv
+                result = ea.main()
+        finally:
+            elapsed = time.perf_counter() - start
+            sys.stdout, sys.stderr = stdout, stderr
+    return {"exit": result, "wall_ms": round(elapsed * 1000, 1),
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+
+def run_scenario(scenario: Scenario, latency: float = 0.0, throttle_every: int = 0, big_repos: int = 5000) -> Dict:
+    """Start a mock API and fake gh, run `scenario` in a child process and collect its numbers."""
+    fixtures = build_fixtures(users=scenario.users, big_repos=big_repos)
+    with tempfile.TemporaryDirectory() as tmp, MockGitHub(fixtures, scenario.viewer, latency, throttle_every) as mock:
+        home = Path(tmp)
+        bin_dir = home / "bin"
+        bin_dir.mkdir()
+        gh = bin_dir / "gh"
+        gh.write_text(FAKE_GH.format(python=sys.executable, scripts=str(SCRIPTS_DIR)))
+        gh.chmod(0o755)
+        gh_log = home / "gh.log"
+        gh_log.touch()
+        (home / "users.txt").write_text("\n".join(list(fixtures["users"])[:scenario.users]) + "\n")
+        env = {**os.environ, "HOME": str(home), "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+               "GH_TOKEN": "benchmark-token", "GITHUB_API_URL": mock.url, "FAKE_GH_LOG": str(gh_log)}
+        env.pop("GITHUB_TOKEN", None)
+        proc = subprocess.run([sys.executable, __file__, "--child", scenario.name], env=env,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{scenario.name} failed: {proc.stderr.strip()}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        with open(gh_log) as f:
+            result["gh_processes"] = sum(1 for _ in f)
+        result["requests"] = mock.requests
+    return result
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float,
+            counts_only: bool = False) -> List[str]:
+    """Regressions against `baseline`: a failing command, more requests or gh processes, or
+    (unless `counts_only`) slower/larger beyond `tolerance`."""
+    problems = []
+    for name, result in results.items():
+        if result.get("exit"):
+            problems.append(f"{name}: exited with status {result['exit']}")
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key in ("requests", "gh_processes"):
+            if result[key] > base[key]:
+                problems.append(f"{name}: {key} {base[key]} -> {result[key]}")
+        for key in () if counts_only else ("wall_ms", "peak_rss_mb"):
+            if result[key] > base[key] * (1 + tolerance):
+                problems.append(f"{name}: {key} {base[key]} -> {result[key]} (+{result[key] / base[key] - 1:.0%})")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the achievements scripts against a local mock API")
+    parser.add_argument("--scenario", action="append", choices=[s.name for s in SCENARIOS],
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Milliseconds added to every API response")
+    parser.add_argument("--big-repos", type=int, default=5000,
+                        help="Repos owned by the large user, i.e. pagination depth (default: 5000)")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with a 429")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the median wall time is kept")
+    parser.add_argument("--save-baseline", type=Path, nargs="?", const=DEFAULT_BASELINE,
+                        help=f"Write results as the baseline (default: {DEFAULT_BASELINE.relative_to(SCRIPTS_DIR.parent)})")
+    parser.add_argument("--compare", type=Path, nargs="?", const=DEFAULT_BASELINE,
+                        help="Compare against a saved baseline and exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown in wall time and memory (default: 0.25)")
+    parser.add_argument("--counts-only", action="store_true",
+                        help="Only compare request and gh process counts, which don't depend on the machine")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        scenario = next(s for s in SCENARIOS if s.name == args.child)
+        print(json.dumps(run_child(scenario, Path(os.environ["HOME"]))))
+        return 0
+
+    settings = {"latency_ms": args.latency, "throttle_every": args.throttle_every, "big_repos": args.big_repos}
+    results: Dict[str, Dict] = {}
+    for scenario in SCENARIOS:
+        if args.scenario and scenario.name not in args.scenario:
+            continue
+        runs = [run_scenario(scenario, args.latency / 1000, args.throttle_every, args.big_repos)
+                for _ in range(max(1, args.repeat))]
+        results[scenario.name] = {**runs[0], "wall_ms": statistics.median(r["wall_ms"] for r in runs),
+                                  "peak_rss_mb": max(r["peak_rss_mb"] for r in runs)}
+        if not args.json:
+            r = results[scenario.name]
+            print(f"{scenario.name:<22} {r['wall_ms']:>9.1f} ms {r['requests']:>6} requests "
+                  f"{r['gh_processes']:>5} gh {r['peak_rss_mb']:>7.1f} MB  {scenario.description}")
+    if args.json:
+        print(json.dumps({"settings": settings, "results": results}, indent=2))
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save_baseline, "w") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save_baseline}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != settings:
+            print(f"Warning: baseline was recorded with {baseline.get('settings')}", file=sys.stderr)
+        problems = compare(results, baseline.get("results", {}), args.tolerance, args.counts_only)
+        for problem in problems:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        if problems:
+            return 1
+        print("No regressions against the baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
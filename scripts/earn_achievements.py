@@ -12,18 +12,73 @@ Usage:
   earn_achievements.py seed     # Create legitimate action issues
   earn_achievements.py auto     # Run status + seed
   earn_achievements.py config   # Show/edit configuration
+  earn_achievements.py watch    # Poll metrics and print changes
+  earn_achievements.py serve-webhooks  # Update counters from webhooks
+  earn_achievements.py history  # Show recorded metrics over time
+  earn_achievements.py cache    # Show/clear the API response cache
   earn_achievements.py --version  # Show version
 """
 __version__ = "1.0.0"
 
 import argparse
+import copy
+import hashlib
+import hmac
 import json
 import os
-import subprocess
+import queue
+import random
+import re
 import sys
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
+# http.client, http.server, sqlite3, subprocess and concurrent.futures are imported where
+# they are used, so commands like `config` don't pay for them at startup.
+if TYPE_CHECKING:
+    import http.client
+    import subprocess
+    from concurrent.futures import Future
+
+API_URL = "https://api.github.com"
+MAX_WORKERS = 8
+PAGE_SIZE = 100
+SEED_LABEL = "achievement-seed"
+SEARCH_COST = 2.0  # search calls draw on the 30/minute budget
+SEARCH_EPOCH = date(2008, 1, 1)  # nothing on GitHub was created before this
+SEARCH_SHARD_TARGET = 500  # results one date shard should hold for search to count it reliably
+SEARCH_SLOW_SECONDS = 10.0  # a full-range query slower than this is sharded from then on
+SEARCH_SETTLE_DAYS = 2  # date shards that ended this long ago are final
+EVENTS_MAX_PAGES = 3  # the events API only serves the latest 300 events
+# Resource -> (requests per window, window seconds, burst size)
+RATE_LIMITS = {
+    "core": (5000, 3600, 100),
+    "search": (30, 60, 10),
+    "graphql": (5000, 3600, 100),
+}
+MAX_RETRIES = 3
+MAX_RETRY_WAIT = 60.0
+PROBE_TTL = 24 * 3600
+# Metric -> seconds a last-known-good value may stand in for a failed fetch (`stale_ttl` in the config)
+STALE_TTL = {"default": 7 * 86400, "followers": 86400, "following": 86400, "contributions": 86400}
+REPO_FIELDS = ("stargazers_count", "visibility", "fork")
+CACHE_MAX_BYTES = 5 * 1024 * 1024
+FIELD_FLAGS = ("-f", "-F", "--raw-field", "--field")
 CONFIG_FILE = Path.home() / ".config" / "github-achievements" / "config.json"
 DEFAULT_CONFIG = {
     "repo": "owner/repo",
@@ -32,8 +87,8 @@ DEFAULT_CONFIG = {
         "galaxy_brain": {"threshold": [2, 8, 16, 32], "enabled": True},
         "starstruck": {"threshold": [16, 128, 512, 4096], "enabled": True},
         "pair_extraordinaire": {"threshold": [1, 10, 24, 48], "enabled": True},
-        "quickdraw": {"enabled": True},
-        "yolo": {"enabled": True},
+        "quickdraw": {"threshold": [1], "enabled": True},
+        "yolo": {"threshold": [1], "enabled": True},
         "public_sponsor": {"enabled": True},
         "hacker": {"enabled": True},
         "founder": {"enabled": True},
@@ -44,168 +99,2368 @@ DEFAULT_CONFIG = {
 }
 
 
-def ensure_config_dir() -> None:
-    CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
+def ensure_config_dir() -> None:
+    CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+
+_config_cache: Optional[Tuple[Path, Optional[int], Dict]] = None
+
+
+def load_config() -> Dict:
+    """Parsed once per process; the file is only re-read when its mtime changes."""
+    global _config_cache
+    try:
+        mtime: Optional[int] = CONFIG_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if _config_cache is None or _config_cache[:2] != (CONFIG_FILE, mtime):
+        config = DEFAULT_CONFIG
+        if mtime is not None:
+            with open(CONFIG_FILE) as f:
+                config = json.load(f)
+        _config_cache = (CONFIG_FILE, mtime, config)
+    return copy.deepcopy(_config_cache[2])
+
+
+def save_config(config: Dict) -> None:
+    global _config_cache
+    ensure_config_dir()
+    with open(CONFIG_FILE, "w") as f:
+        json.dump(config, f, indent=2)
+    _config_cache = None
+
+
+def get_config_value(key: str, default=None):
+    config = load_config()
+    keys = key.split(".")
+    value = config
+    for k in keys:
+        if isinstance(value, dict):
+            value = value.get(k, default)
+        else:
+            return default
+    return value
+
+
+def run(cmd: List[str], check: bool = True) -> "subprocess.CompletedProcess":
+    import subprocess
+
+    if _cassette is not None and _cassette.replaying:
+        raise CassetteError(f"'{cmd[0]}' cannot run while replaying a cassette")
+    tracer = _tracer
+    if tracer is None:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    else:
+        with tracer.span(" ".join(cmd[:3]), "subprocess") as span:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            span.update(exit=result.returncode, bytes=len(result.stdout or ""))
+    if check and result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return result
+
+
+def _arg_value(args: List[str], flags: Tuple[str, ...]) -> Optional[str]:
+    for i, arg in enumerate(args[:-1]):
+        if arg in flags:
+            return args[i + 1]
+    return None
+
+
+def is_cacheable(args: List[str]) -> bool:
+    """Only single-page REST GETs can be revalidated with an ETag."""
+    if len(args) < 2 or args[0] != "api" or "--paginate" in args:
+        return False
+    if args[1].lstrip("/").startswith("graphql"):
+        return False
+    method = _arg_value(args, ("--method", "-X"))
+    if method is not None:
+        return method.upper() == "GET"
+    return not any(arg in FIELD_FLAGS for arg in args)
+
+
+def parse_http_output(output: str) -> Tuple[Optional[int], Dict[str, str], str]:
+    """Split `gh api --include` output into status code, lower-cased headers and body."""
+    if not output.startswith("HTTP/"):
+        return None, {}, output
+    normalized = output.replace("\r\n", "\n")
+    head, _, body = normalized.partition("\n\n")
+    lines = head.split("\n")
+    parts = lines[0].split()
+    status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return status, headers, body
+
+
+class ApiResponse(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: str
+    error: str = ""
+
+
+class GhTransport:
+    """Runs every request through a `gh` subprocess."""
+
+    name = "gh"
+
+    def request(self, args: List[str], headers: Optional[Dict[str, str]] = None) -> ApiResponse:
+        cmd = ["gh"] + args
+        include = bool(args) and args[0] == "api" and "--paginate" not in args
+        if include:
+            cmd.append("--include")
+        for name, value in (headers or {}).items():
+            cmd += ["-H", f"{name}: {value}"]
+        proc = run(cmd, check=False)
+        stdout = proc.stdout if isinstance(proc.stdout, str) else ""
+        status, response_headers, body = parse_http_output(stdout) if include else (None, {}, stdout)
+        error = "" if proc.returncode == 0 else (proc.stderr.strip() or stdout.strip())
+        if status is None:
+            if error:
+                raise RuntimeError(error)
+            status = 200
+        return ApiResponse(status, response_headers, body, error)
+
+    def close(self) -> None:
+        pass
+
+
+def parse_api_args(args: List[str]) -> Optional[Dict]:
+    """Translate `gh api` arguments into an HTTP request, or None if only gh can run them."""
+    if len(args) < 2 or args[0] != "api":
+        return None
+    endpoint = args[1]
+    if "{" in endpoint:
+        return None
+    method = None
+    fields: Dict[str, object] = {}
+    headers: Dict[str, str] = {}
+    paginate = False
+    i = 2
+    while i < len(args):
+        flag = args[i]
+        value = args[i + 1] if i + 1 < len(args) else None
+        if flag == "--paginate":
+            paginate = True
+            i += 1
+            continue
+        if flag in ("-i", "--include"):
+            i += 1
+            continue
+        if value is None:
+            return None
+        if flag in ("-X", "--method"):
+            method = value.upper()
+        elif flag in ("-H", "--header"):
+            name, _, header_value = value.partition(":")
+            headers[name.strip()] = header_value.strip()
+        elif flag in ("-f", "--raw-field"):
+            key, _, field = value.partition("=")
+            fields[key] = field
+        elif flag in ("-F", "--field"):
+            key, _, field = value.partition("=")
+            if field.startswith("@"):
+                return None
+            typed = {"true": True, "false": False, "null": None}
+            fields[key] = typed[field] if field in typed else int(field) if field.lstrip("-").isdigit() else field
+        else:
+            return None
+        i += 2
+
+    graphql = endpoint.lstrip("/") == "graphql"
+    if method is None:
+        method = "POST" if fields or graphql else "GET"
+    path = "/" + endpoint.lstrip("/")
+    body = None
+    if graphql:
+        query = fields.pop("query", "")
+        body = json.dumps({"query": query, "variables": fields})
+    elif method == "GET":
+        if fields:
+            separator = "&" if "?" in path else "?"
+            path += separator + urllib.parse.urlencode({k: "" if v is None else v for k, v in fields.items()})
+    elif fields:
+        body = json.dumps(fields)
+    return {"method": method, "path": path, "body": body, "headers": headers, "paginate": paginate, "graphql": graphql}
+
+
+class HttpTransport:
+    """Stdlib HTTPS client that reuses keep-alive connections from a small pool."""
+
+    name = "http"
+
+    def __init__(self, token: str, base_url: Optional[str] = None, pool_size: int = MAX_WORKERS,
+                 fallback: Optional[GhTransport] = None) -> None:
+        parts = urllib.parse.urlsplit(base_url or os.environ.get("GITHUB_API_URL") or API_URL)
+        self.token = token
+        self.scheme = parts.scheme
+        self.host = parts.hostname or "api.github.com"
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.fallback = fallback or GhTransport()
+        self.connections_opened = 0
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self) -> "http.client.HTTPConnection":
+        import http.client
+
+        self.connections_opened += 1
+        if self.scheme == "http":
+            return http.client.HTTPConnection(self.host, self.port, timeout=30)
+        return http.client.HTTPSConnection(self.host, self.port, timeout=30)
+
+    def _release(self, conn: "http.client.HTTPConnection") -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _send(self, method: str, path: str, body: Optional[str], headers: Dict[str, str]) -> ApiResponse:
+        request_headers = {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self.token}",
+            "User-Agent": f"github-achievements/{__version__}",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+        if body is not None:
+            request_headers["Content-Type"] = "application/json"
+        request_headers.update(headers)
+        from http.client import HTTPException
+
+        for attempt in range(2):
+            try:
+                conn = self._pool.get_nowait()
+                reused = True
+            except queue.Empty:
+                conn = self._connect()
+                reused = False
+            try:
+                conn.request(method, self.prefix + path, body=body, headers=request_headers)
+                resp = conn.getresponse()
+                data = resp.read().decode("utf-8")
+            except (HTTPException, ConnectionError) as e:
+                conn.close()
+                # A pooled connection may have been dropped by the server while idle.
+                if reused and attempt == 0:
+                    continue
+                raise RuntimeError(f"{method} {path}: {e}") from e
+            except OSError as e:
+                conn.close()
+                raise RuntimeError(f"{method} {path}: {e}") from e
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return ApiResponse(resp.status, {k.lower(): v for k, v in resp.getheaders()}, data, _http_error(resp.status, data))
+        raise RuntimeError(f"{method} {path}: connection failed")
+
+    def request(self, args: List[str], headers: Optional[Dict[str, str]] = None) -> ApiResponse:
+        spec = parse_api_args(args)
+        if spec is None:
+            return self.fallback.request(args, headers)
+        merged = {**spec["headers"], **(headers or {})}
+        response = self._send(spec["method"], spec["path"], spec["body"], merged)
+        if not spec["paginate"] or response.error:
+            return response
+        pages = [json.loads(response.body)]
+        next_url = _next_link(response.headers.get("link", ""))
+        while next_url:
+            parts = urllib.parse.urlsplit(next_url)
+            path = parts.path[len(self.prefix):] + (f"?{parts.query}" if parts.query else "")
+            page = self._send("GET", path, None, merged)
+            if page.error:
+                return page
+            pages.append(json.loads(page.body))
+            next_url = _next_link(page.headers.get("link", ""))
+        if all(isinstance(p, list) for p in pages):
+            merged_body = json.dumps([item for p in pages for item in p])
+        else:
+            merged_body = "".join(json.dumps(p) for p in pages)
+        return ApiResponse(response.status, response.headers, merged_body)
+
+
+def _http_error(status: int, body: str) -> str:
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+    if status >= 400:
+        message = data.get("message") if isinstance(data, dict) else ""
+        return f"{message or 'request failed'} (HTTP {status})"
+    if isinstance(data, dict) and data.get("errors"):
+        # gh exits non-zero whenever a GraphQL response carries errors.
+        return "; ".join(str(e.get("message", e)) if isinstance(e, dict) else str(e) for e in data["errors"])
+    return ""
+
+
+def _next_link(link_header: str) -> Optional[str]:
+    for part in link_header.split(","):
+        url, _, rel = part.partition(";")
+        if 'rel="next"' in rel:
+            return url.strip().strip("<>")
+    return None
+
+
+def resolve_token() -> Optional[str]:
+    for var in ("GH_TOKEN", "GITHUB_TOKEN"):
+        if os.environ.get(var):
+            return os.environ[var]
+    try:
+        proc = run(["gh", "auth", "token"], check=False)
+    except FileNotFoundError:
+        return None
+    token = proc.stdout.strip() if proc.returncode == 0 else ""
+    return token or None
+
+
+_transport = GhTransport()
+
+
+def get_transport():
+    return _transport
+
+
+def make_transport(name: str = "auto"):
+    """Build the backend behind gh_json: `http`, `gh`, or `auto` (http when GH_TOKEN is set)."""
+    token = None
+    if name == "http":
+        token = resolve_token()
+    elif name == "auto":
+        token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+    return HttpTransport(token, fallback=GhTransport()) if token else GhTransport()
+
+
+@contextmanager
+def use_transport(transport) -> Iterator:
+    global _transport
+    previous = _transport
+    _transport = transport
+    try:
+        yield transport
+    finally:
+        transport.close()
+        _transport = previous
+
+
+def rate_limit_resource(args: List[str]) -> str:
+    if len(args) >= 2 and args[0] == "api":
+        endpoint = args[1].lstrip("/")
+        if endpoint.startswith("search/"):
+            return "search"
+        if endpoint.startswith("graphql"):
+            return "graphql"
+    return "core"
+
+
+class TokenBucket:
+    """Pace requests to `rate` per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def allow(self, spare: float, rate: float) -> None:
+        """Let `spare` requests through without waiting, then pace at `rate` per second."""
+        with self._lock:
+            self.rate = rate
+            self.capacity = max(spare, 1.0)
+            self.tokens = spare if spare > 0 else min(self.tokens, 0.0)
+            self._updated = self._clock()
+
+
+class RateLimitScheduler:
+    """Paces gh_json requests per rate-limit resource and retries throttled responses."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 max_retries: int = MAX_RETRIES, max_wait: float = MAX_RETRY_WAIT) -> None:
+        self.buckets = {name: TokenBucket(limit / window, burst, clock) for name, (limit, window, burst) in RATE_LIMITS.items()}
+        self.budget: Dict[str, Dict[str, int]] = {}
+        self.requests = 0
+        self.retries = 0
+        self.waited = 0.0
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def _wait(self, seconds: float) -> None:
+        if seconds > 0:
+            with self._lock:
+                self.waited += seconds
+            self._sleep(seconds)
+
+    def update(self, resource: str, headers: Dict[str, str]) -> None:
+        if "x-ratelimit-remaining" not in headers:
+            return
+        resource = headers.get("x-ratelimit-resource", resource)
+        budget = {}
+        for field in ("limit", "remaining", "used", "reset"):
+            value = headers.get(f"x-ratelimit-{field}", "")
+            if value.isdigit():
+                budget[field] = int(value)
+        with self._lock:
+            self.budget[resource] = budget
+        bucket = self.buckets.get(resource)
+        if bucket is not None and "remaining" in budget and "reset" in budget:
+            # Spend freely down to a reserve of one burst; only what is left below it is
+            # spread evenly over the window instead of bursting into a 403.
+            window = max(1.0, budget["reset"] - time.time())
+            _, seconds, burst = RATE_LIMITS[resource]
+            bucket.allow(budget["remaining"] - burst, max(budget["remaining"] / window, 1.0 / seconds))
+
+    def retry_delay(self, attempt: int, response: ApiResponse) -> Optional[float]:
+        """Seconds to wait before retrying a throttled response, or None if it is a real error."""
+        headers = response.headers
+        throttled = response.status == 429 or (
+            response.status == 403 and (
+                "retry-after" in headers
+                or headers.get("x-ratelimit-remaining") == "0"
+                or "rate limit" in (response.error + response.body).lower()
+            )
+        )
+        if not throttled or attempt >= self.max_retries:
+            return None
+        if headers.get("retry-after", "").isdigit():
+            delay = float(headers["retry-after"])
+        elif headers.get("x-ratelimit-remaining") == "0" and headers.get("x-ratelimit-reset", "").isdigit():
+            delay = float(headers["x-ratelimit-reset"]) - time.time()
+        else:
+            delay = random.uniform(0, 2 ** attempt)
+        delay = max(0.0, delay) + random.uniform(0, 1)
+        return delay if delay <= self.max_wait else None
+
+    def send(self, transport, args: List[str], headers: Dict[str, str]) -> ApiResponse:
+        resource = rate_limit_resource(args)
+        attempt = 0
+        while True:
+            self._wait(min(self.buckets[resource].reserve(), self.max_wait))
+            response = transport.request(args, headers)
+            with self._lock:
+                self.requests += 1
+            self.update(resource, response.headers)
+            delay = self.retry_delay(attempt, response)
+            if delay is None:
+                trace_note(resource=resource, retries=attempt)
+                return response
+            with self._lock:
+                self.retries += 1
+            self._wait(delay)
+            attempt += 1
+
+    def exhausted(self, resource: str) -> bool:
+        budget = self.budget.get(resource, {})
+        return budget.get("remaining") == 0 and budget.get("reset", 0) > time.time()
+
+    def summary(self) -> str:
+        parts = []
+        for resource in sorted(self.budget):
+            budget = self.budget[resource]
+            part = f"{resource} {budget.get('remaining', '?')}/{budget.get('limit', '?')}"
+            if "reset" in budget:
+                part += f" (resets {time.strftime('%H:%M:%S', time.localtime(budget['reset']))})"
+            parts.append(part)
+        text = "Rate limit remaining: " + (", ".join(parts) if parts else "unknown")
+        if self.retries:
+            text += f"; {self.retries} throttled retries"
+        return text
+
+
+_scheduler: Optional[RateLimitScheduler] = None
+
+
+@contextmanager
+def rate_limit_scope(scheduler: Optional[RateLimitScheduler] = None) -> Iterator[RateLimitScheduler]:
+    global _scheduler
+    previous = _scheduler
+    _scheduler = scheduler or RateLimitScheduler()
+    try:
+        yield _scheduler
+    finally:
+        _scheduler = previous
+
+
+class Tracer:
+    """Timed spans for API calls, subprocesses and metric fetches (--profile / --trace-file).
+
+    Spans nest per thread; a span opened inside a metric fetch inherits its `metric`.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self.origin = clock()
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def current(self) -> Optional[Dict]:
+        """Fields of the innermost open span on this thread."""
+        return getattr(self._local, "current", None)
+
+    @contextmanager
+    def span(self, name: str, category: str, **fields) -> Iterator[Dict]:
+        parent = self.current()
+        if parent and "metric" in parent:
+            fields.setdefault("metric", parent["metric"])
+        self._local.current = fields
+        start = self.clock()
+        try:
+            yield fields
+        except Exception as e:
+            fields["error"] = str(e)[:200]
+            raise
+        finally:
+            end = self.clock()
+            self._local.current = parent
+            with self._lock:
+                self.spans.append({"name": name, "cat": category, "ts": (start - self.origin) * 1e6,
+                                   "dur": (end - start) * 1e6, "tid": threading.get_ident(), "args": fields})
+
+    def carry(self, fn: Callable) -> Callable:
+        """Wrap `fn` so spans it opens on a worker thread nest under the caller's current span."""
+        parent = self.current()
+
+        def wrapper(*args, **kwargs):
+            previous = self.current()
+            self._local.current = parent
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.current = previous
+
+        return wrapper
+
+    def chrome_trace(self) -> Dict:
+        """Chrome trace-event JSON (chrome://tracing, Perfetto, speedscope)."""
+        threads = {tid: n for n, tid in enumerate(dict.fromkeys(span["tid"] for span in self.spans))}
+        events = [{**span, "ph": "X", "pid": os.getpid(), "tid": threads[span["tid"]]} for span in self.spans]
+        return {"traceEvents": sorted(events, key=lambda e: e["ts"]), "displayTimeUnit": "ms"}
+
+    def summary(self) -> str:
+        """API calls grouped by endpoint and metric, most rate-limit cost first."""
+        rows: Dict[Tuple[str, str], Dict] = {}
+        for span in self.spans:
+            if span["cat"] != "api":
+                continue
+            fields = span["args"]
+            row = rows.setdefault((span["name"], fields.get("metric", "")),
+                                  {"calls": 0, "ms": 0.0, "bytes": 0, "cached": 0, "retries": 0, "cost": 0.0, "errors": 0})
+            row["calls"] += 1
+            row["ms"] += span["dur"] / 1000
+            row["bytes"] += fields.get("bytes", 0)
+            row["cached"] += fields.get("cache") in ("memo", "304")
+            row["retries"] += fields.get("retries", 0)
+            row["errors"] += "error" in fields
+            if fields.get("cache") not in ("memo", "304"):
+                weight = SEARCH_COST if fields.get("resource") == "search" else 1.0
+                row["cost"] += weight * (1 + fields.get("retries", 0))
+        lines = [f"{'cost':>6} {'calls':>5} {'cached':>6} {'retries':>7} {'ms':>8} {'bytes':>9}  endpoint [metric]"]
+        for (name, metric), row in sorted(rows.items(), key=lambda item: (-item[1]["cost"], -item[1]["ms"])):
+            label = f"{name} [{metric}]" if metric else name
+            if row["errors"]:
+                label += f" ({row['errors']} failed)"
+            lines.append(f"{row['cost']:>6.1f} {row['calls']:>5} {row['cached']:>6} {row['retries']:>7} "
+                         f"{row['ms']:>8.1f} {row['bytes']:>9}  {label}")
+        return "\n".join(lines)
+
+
+_tracer: Optional[Tracer] = None
+
+
+@contextmanager
+def trace_scope(enabled: bool = True) -> Iterator[Optional[Tracer]]:
+    """Record spans until the block exits; when disabled the hooks stay a single None check."""
+    global _tracer
+    if not enabled:
+        yield None
+        return
+    previous = _tracer
+    _tracer = Tracer()
+    try:
+        yield _tracer
+    finally:
+        _tracer = previous
+
+
+def trace_note(**fields) -> None:
+    """Add fields to the innermost open span, if tracing is on."""
+    tracer = _tracer
+    if tracer is not None:
+        span = tracer.current()
+        if span is not None:
+            span.update(fields)
+
+
+def trace_name(args: List[str]) -> str:
+    """Span name for a gh call: the endpoint without its query string."""
+    if len(args) >= 2 and args[0] == "api":
+        return "/" + args[1].lstrip("/").split("?", 1)[0]
+    return " ".join(args[:2])
+
+
+def _gh_json_uncached(args: List[str]) -> Dict:
+    cache = _response_cache if is_cacheable(args) else None
+    key = cache_key(args) if cache is not None else ""
+    entry = cache.get(key) if cache is not None else None
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    scheduler = _scheduler
+    if scheduler is not None:
+        response = scheduler.send(get_transport(), args, headers)
+    else:
+        response = get_transport().request(args, headers)
+    if response.status == 304 and entry is not None:
+        cache.revalidated += 1
+        trace_note(cache="304", status=304)
+        return json.loads(entry["body"])
+    trace_note(cache="miss" if cache is not None else "none", status=response.status, bytes=len(response.body))
+    if response.error or response.status >= 300:
+        raise RuntimeError(response.error or f"HTTP {response.status}")
+    if cache is not None:
+        cache.put(key, response.body, response.headers.get("etag"), response.headers.get("last-modified"))
+    return json.loads(response.body)
+
+
+def cache_file() -> Path:
+    return CONFIG_FILE.parent / "api-cache.json"
+
+
+def cache_key(args: List[str]) -> str:
+    return "\x1f".join(normalize_args(args))
+
+
+class ResponseCache:
+    """On-disk LRU of response bodies with their ETag / Last-Modified validators."""
+
+    def __init__(self, path: Path, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.revalidated = 0
+        self.stored = 0
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path.exists():
+            try:
+                with open(path) as f:
+                    self._entries.update(json.load(f).get("entries", {}))
+            except (OSError, ValueError):
+                self._entries.clear()
+        self.size = sum(len(e.get("body", "")) for e in self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._dirty = True
+            return entry
+
+    def put(self, key: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old.get("body", ""))
+            self._entries[key] = {"etag": etag, "last_modified": last_modified, "body": body}
+            self.size += len(body)
+            self.stored += 1
+            self._dirty = True
+            while self._entries and self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.get("body", ""))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump({"entries": self._entries}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def open_response_cache() -> ResponseCache:
+    max_bytes = int(get_config_value("cache.max_bytes", CACHE_MAX_BYTES))
+    return ResponseCache(cache_file(), max_bytes)
+
+
+@contextmanager
+def persistent_cache(enabled: bool = True) -> Iterator[Optional[ResponseCache]]:
+    """Revalidate cacheable requests against the on-disk cache, saving it on exit."""
+    global _response_cache
+    if not enabled:
+        yield None
+        return
+    previous = _response_cache
+    _response_cache = open_response_cache()
+    try:
+        yield _response_cache
+    finally:
+        try:
+            _response_cache.save()
+        except OSError:
+            pass
+        _response_cache = previous
+
+
+def normalize_args(args: List[str]) -> Tuple[str, ...]:
+    """Cache key for a gh invocation: `api /users/x` and `api users/x` are the same request."""
+    if len(args) >= 2 and args[0] == "api":
+        return ("api", args[1].lstrip("/")) + tuple(args[2:])
+    return tuple(args)
+
+
+def _is_memoizable(args: List[str]) -> bool:
+    """Only reads are shared: REST GETs (as is_cacheable decides them) and GraphQL queries."""
+    if len(args) < 2 or args[0] != "api":
+        return False
+    if args[1].lstrip("/").startswith("graphql"):
+        query = next((arg.partition("=")[2] for arg in args if arg.startswith("query=")), "")
+        return not query.lstrip().startswith("mutation")
+    method = _arg_value(args, ("--method", "-X"))
+    if method is not None:
+        return method.upper() == "GET"
+    return not any(arg in FIELD_FLAGS for arg in args)
+
+
+def _is_page_fetch(args: List[str]) -> bool:
+    """A numbered page of a list endpoint, as requested by iter_pages."""
+    if len(args) < 2 or args[0] != "api":
+        return False
+    return "page" in urllib.parse.parse_qs(urllib.parse.urlsplit(args[1]).query)
+
+
+class RequestMemo:
+    """Responses shared by every gh_json call made during one command run."""
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple[str, ...], "Future"] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fetch(self, args: List[str], fetcher: Callable[[List[str]], Dict]) -> Dict:
+        from concurrent.futures import Future
+
+        key = normalize_args(args)
+        with self._lock:
+            future = self._entries.get(key)
+            owner = future is None
+            if owner:
+                future = self._entries[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+        if not owner:
+            return future.result()
+        try:
+            data = fetcher(args)
+        except BaseException as e:
+            with self._lock:
+                del self._entries[key]
+            future.set_exception(e)
+            raise
+        future.set_result(data)
+        if key == ("api", "user") and isinstance(data, dict) and data.get("login"):
+            # /user is a superset of the public /users/{login} profile.
+            self.prime(["api", f"/users/{data['login']}"], data)
+        return data
+
+    def has(self, args: List[str]) -> bool:
+        with self._lock:
+            return normalize_args(args) in self._entries
+
+    def prime(self, args: List[str], data: Dict) -> None:
+        from concurrent.futures import Future
+
+        key = normalize_args(args)
+        with self._lock:
+            if key not in self._entries:
+                future = Future()
+                future.set_result(data)
+                self._entries[key] = future
+
+
+_request_memo: Optional[RequestMemo] = None
+_thread_memo = threading.local()
+
+
+def current_memo() -> Optional[RequestMemo]:
+    memo = getattr(_thread_memo, "memo", None)
+    return memo if memo is not None else _request_memo
+
+
+@contextmanager
+def request_scope(local: bool = False) -> Iterator[RequestMemo]:
+    """Memoize gh_json responses until the block exits.
+
+    With `local`, the memo only covers this thread and the workers it starts through
+    carry(), so concurrent scopes (one per user in a batch) don't share responses.
+    """
+    global _request_memo
+    memo = RequestMemo()
+    if local:
+        previous = getattr(_thread_memo, "memo", None)
+        _thread_memo.memo = memo
+    else:
+        previous, _request_memo = _request_memo, memo
+    try:
+        yield memo
+    finally:
+        if local:
+            _thread_memo.memo = previous
+        else:
+            _request_memo = previous
+
+
+def carry(fn: Callable) -> Callable:
+    """Wrap `fn` for a worker thread so it keeps the caller's trace span and request memo."""
+    if _tracer is not None:
+        fn = _tracer.carry(fn)
+    memo = getattr(_thread_memo, "memo", None)
+    if memo is None:
+        return fn
+
+    def wrapper(*args, **kwargs):
+        previous = getattr(_thread_memo, "memo", None)
+        _thread_memo.memo = memo
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _thread_memo.memo = previous
+
+    return wrapper
+
+
+def gh_json(args: List[str]) -> Dict:
+    cassette = _cassette
+    if cassette is not None:
+        if cassette.replaying:
+            return cassette.play(args)
+        return cassette.capture(args, _gh_json_traced)
+    return _gh_json_traced(args)
+
+
+def _gh_json_traced(args: List[str]) -> Dict:
+    tracer = _tracer
+    if tracer is None:
+        return _gh_json(args)
+    # Stays "memo" unless the request actually goes out (see _gh_json_uncached).
+    with tracer.span(trace_name(args), "api", cache="memo"):
+        return _gh_json(args)
+
+
+def _gh_json(args: List[str]) -> Dict:
+    memo = current_memo()
+    # Pages are streamed once and dropped; keeping them would hold whole listings in memory.
+    if memo is None or not _is_memoizable(args) or _is_page_fetch(args):
+        return _gh_json_uncached(args)
+    return memo.fetch(args, _gh_json_uncached)
+
+
+class CassetteError(RuntimeError):
+    pass
+
+
+class Cassette:
+    """gh_json results saved by --record and served by --replay.
+
+    Holds the recording time and config too, so a replay computes the same dates and
+    thresholds and prints byte-identical output.
+    """
+
+    FILE_NAME = "cassette.json"
+
+    def __init__(self, recorded_at: float, config: Dict, calls: Optional[Dict[str, Dict]] = None,
+                 replaying: bool = False) -> None:
+        self.recorded_at = recorded_at
+        self.config = config
+        self.calls: Dict[str, Dict] = calls or {}
+        self.replaying = replaying
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, directory: Path) -> "Cassette":
+        path = Path(directory) / cls.FILE_NAME
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CassetteError(f"cannot read cassette {path}: {e}")
+        return cls(data["recorded_at"], data["config"], data["calls"], replaying=True)
+
+    def save(self, directory: Path) -> Path:
+        path = Path(directory) / self.FILE_NAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"version": 1, "recorded_at": self.recorded_at, "config": self.config, "calls": self.calls},
+                      f, sort_keys=True, separators=(",", ":"))
+        return path
+
+    def capture(self, args: List[str], fetch: Callable[[List[str]], Dict]) -> Dict:
+        key = cache_key(args)
+        try:
+            data = fetch(args)
+        except RuntimeError as e:
+            with self._lock:
+                self.calls[key] = {"error": str(e)}
+            raise
+        with self._lock:
+            self.calls[key] = {"data": data}
+        return data
+
+    def play(self, args: List[str]) -> Dict:
+        call = self.calls.get(cache_key(args))
+        if call is None:
+            raise CassetteError(f"not in cassette: {' '.join(args)}")
+        if "error" in call:
+            raise RuntimeError(call["error"])
+        return call["data"]
+
+
+_cassette: Optional[Cassette] = None
+_frozen_time: Optional[float] = None
+
+
+def current_time(tz: Optional[timezone] = None) -> datetime:
+    """datetime.now(), pinned to the recording time while recording or replaying a cassette."""
+    if _frozen_time is None:
+        return datetime.now(tz)
+    return datetime.fromtimestamp(_frozen_time, tz)
+
+
+@contextmanager
+def cassette_scope(record: Optional[str] = None, replay: Optional[str] = None) -> Iterator[Optional[Cassette]]:
+    """Record or replay every gh_json call made in the block.
+
+    Both modes run against a throwaway config directory (seeded with the real or the
+    recorded config), so local state such as the event store or response cache can't
+    make a replay diverge from its recording, and replays don't write to history.
+    """
+    global _cassette, _frozen_time, CONFIG_FILE
+    if not record and not replay:
+        yield None
+        return
+    import tempfile
+
+    cassette = Cassette.load(Path(replay)) if replay else Cassette(time.time(), load_config())
+    previous = (_cassette, _frozen_time, CONFIG_FILE)
+    with tempfile.TemporaryDirectory() as state_dir:
+        CONFIG_FILE = Path(state_dir) / "config.json"
+        save_config(cassette.config)
+        _cassette, _frozen_time = cassette, cassette.recorded_at
+        try:
+            yield cassette
+        finally:
+            _cassette, _frozen_time, CONFIG_FILE = previous
+            if record:
+                path = cassette.save(Path(record))
+                print(f"Recorded {len(cassette.calls)} responses to {path}", file=sys.stderr)
+
+
+def fetch_concurrently(tasks: Dict[str, Callable[[], str]], max_workers: int = MAX_WORKERS) -> Dict[str, str]:
+    """Run independent getters in a bounded thread pool, keeping the order of `tasks`."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    results: Dict[str, str] = {}
+    if not tasks:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks)))) as pool:
+        futures = {name: pool.submit(carry(fn)) for name, fn in tasks.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception:
+                results[name] = "(unavailable)"
+    return results
+
+
+def probe_file() -> Path:
+    return CONFIG_FILE.parent / "probe.json"
+
+
+def probe_key() -> str:
+    """Fingerprint of what the probe depends on: the gh binary, the token and gh's own login state."""
+    import shutil
+
+    gh = shutil.which("gh")
+    gh_config = Path(os.environ.get("GH_CONFIG_DIR") or Path.home() / ".config" / "gh") / "hosts.yml"
+    token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN") or ""
+    parts = [
+        gh,
+        os.stat(gh).st_mtime_ns if gh else None,
+        gh_config.stat().st_mtime_ns if gh_config.exists() else None,
+        hashlib.sha256(token.encode()).hexdigest(),
+        os.environ.get("GH_HOST", ""),
+    ]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+def load_probe() -> Dict:
+    """Cached environment probe, or {} when it is missing, expired or for a different gh/token."""
+    try:
+        with open(probe_file()) as f:
+            probe = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if probe.get("key") != probe_key() or time.time() - probe.get("checked_at", 0) > PROBE_TTL:
+        return {}
+    return probe
+
+
+def save_probe(probe: Dict) -> None:
+    path = probe_file()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({**probe, "key": probe_key(), "checked_at": probe.get("checked_at", int(time.time()))}, f)
+    except OSError:
+        pass
+
+
+def check_gh_installed() -> bool:
+    """True if gh runs; skips spawning `gh --version` while the cached probe still matches."""
+    if _cassette is not None and _cassette.replaying:
+        return True
+    probe = load_probe()
+    if probe.get("gh"):
+        return True
+    try:
+        run(["gh", "--version"], check=False)
+    except FileNotFoundError:
+        return False
+    save_probe({**probe, "gh": True})
+    return True
+
+
+def current_login() -> str:
+    """Authenticated login; `gh api user` is only called when the cached probe has none."""
+    probe = load_probe()
+    if probe.get("login"):
+        return str(probe["login"])
+    login = str(gh_json(["api", "user"]).get("login", ""))
+    if login:
+        save_probe({**probe, "login": login})
+    return login
+
+
+SEARCH_QUERIES = {
+    "merged_prs": "is:pr is:merged author:{user}",
+    "total_prs": "is:pr author:{user}",
+    "total_issues": "is:issue author:{user}",
+}
+
+
+def _search(query: str) -> Dict:
+    return gh_json(["api", "/search/issues", "--method", "GET", "-f", f"q={query}"])
+
+
+def search_count(query: str) -> int:
+    """total_count for `query`, recounted over date shards when search gives up early.
+
+    Search times out on very large result sets and then reports `incomplete_results`
+    with an undercount. Such queries, and ones that were merely slow, are counted by
+    sharded_search_count from then on.
+    """
+    cache = ShardCache()
+    if cache.granularity(query):
+        return sharded_search_count(query, cache)
+    started = time.monotonic()
+    data = _search(query)
+    count = int(data.get("total_count", 0))  # type: ignore[arg-type]
+    if data.get("incomplete_results"):
+        return sharded_search_count(query, cache, count)
+    if time.monotonic() - started > SEARCH_SLOW_SECONDS:
+        cache.sharded[query] = shard_granularity(count)
+        cache.save()
+    return count
+
+
+def search_shards_file() -> Path:
+    return CONFIG_FILE.parent / "search-shards.json"
+
+
+_shard_lock = threading.Lock()
+
+
+class ShardCache:
+    """Counts of settled date shards, which never change, the settled shards that had to be
+    split, and the queries that need sharding."""
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path or search_shards_file()
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.counts: Dict[str, int] = data.get("counts", {})
+        self.sharded: Dict[str, str] = data.get("sharded", {})
+        self.split = set(data.get("split", []))
+
+    def granularity(self, query: str) -> Optional[str]:
+        return self.sharded.get(query)
+
+    def save(self) -> None:
+        # Metrics are counted concurrently, so merge with what other queries saved meanwhile.
+        with _shard_lock:
+            saved = ShardCache(self.path)
+            self.counts = {**saved.counts, **self.counts}
+            self.sharded = {**saved.sharded, **self.sharded}
+            self.split |= saved.split
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump({"counts": self.counts, "sharded": self.sharded, "split": sorted(self.split)},
+                          f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+
+
+def shard_granularity(count: int) -> str:
+    """Start at months when the results are too dense for yearly shards."""
+    years = current_time(timezone.utc).year - SEARCH_EPOCH.year + 1
+    return "month" if count / years > SEARCH_SHARD_TARGET else "year"
+
+
+def shard_field(query: str) -> str:
+    # A merged PR stays merged on the same day, while old PRs can still be merged
+    # today, so merged queries are sharded by merge date to keep old shards final.
+    return "merged" if "is:merged" in query.split() else "created"
+
+
+def date_shards(since: date, until: date, granularity: str) -> List[Tuple[date, date]]:
+    """Calendar-aligned (first, last) day ranges covering since..until, so shard
+    boundaries, and with them the cache keys, are the same on every run."""
+    shards = []
+    start = since
+    while start <= until:
+        if granularity == "year":
+            end = date(start.year, 12, 31)
+        elif granularity == "month":
+            end = date(start.year + start.month // 12, start.month % 12 + 1, 1) - timedelta(days=1)
+        else:
+            end = start
+        shards.append((start, min(end, until)))
+        start = end + timedelta(days=1)
+    return shards
+
+
+FINER_SHARDS = {"year": "month", "month": "day"}
+
+
+def sharded_search_count(query: str, cache: Optional[ShardCache] = None, count: Optional[int] = None) -> int:
+    """Exact total for `query`, summed over date shards searched concurrently.
+
+    Shards that come back incomplete are split into the next finer calendar unit;
+    settled shards are answered from the cache. `count` is the undercount from a
+    full-range attempt, used to pick the starting shard size.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = cache or ShardCache()
+    granularity = cache.granularity(query) or shard_granularity(count or 0)
+    cache.sharded[query] = granularity
+    field = shard_field(query)
+    today = current_time(timezone.utc).date()
+    settled = today - timedelta(days=SEARCH_SETTLE_DAYS)
+
+    def shard_query(shard: Tuple[date, date]) -> str:
+        return f"{query} {field}:{shard[0].isoformat()}..{shard[1].isoformat()}"
+
+    def fetch(shard: Tuple[date, date]) -> Dict:
+        return _search(shard_query(shard))
+
+    def split(shard: Tuple[date, date], unit: str) -> List[Tuple[Tuple[date, date], str]]:
+        finer = FINER_SHARDS[unit]
+        return [(s, finer) for s in date_shards(shard[0], shard[1], finer)]
+
+    total = 0
+    pending = [(shard, granularity) for shard in date_shards(SEARCH_EPOCH, today, granularity)]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        while pending:
+            todo = []
+            while pending:
+                shard, unit = pending.pop()
+                key = shard_query(shard)
+                if key in cache.split:
+                    pending.extend(split(shard, unit))
+                elif key in cache.counts:
+                    total += cache.counts[key]
+                else:
+                    todo.append((shard, unit))
+            results = pool.map(carry(fetch), [s for s, _ in todo])
+            pending = []
+            for (shard, unit), data in zip(todo, results):
+                if data.get("incomplete_results") and unit in FINER_SHARDS:
+                    if shard[1] < settled:
+                        cache.split.add(shard_query(shard))
+                    pending.extend(split(shard, unit))
+                    continue
+                shard_total = int(data.get("total_count", 0))  # type: ignore[arg-type]
+                total += shard_total
+                if shard[1] < settled and not data.get("incomplete_results"):
+                    cache.counts[shard_query(shard)] = shard_total
+    cache.save()
+    return total
+
+
+def fetch_profile(user: str) -> Dict:
+    return gh_json(["api", f"/users/{user}"])
+
+
+def get_merged_prs_count(user: str) -> str:
+    return metric_text(user, "merged_prs")
+
+
+def get_coauthored_prs_count(user: str) -> str:
+    return metric_text(user, "coauthored_prs")
+
+
+def iter_pages(endpoint: str, per_page: int = PAGE_SIZE) -> Iterator[List[Dict]]:
+    """Yield a list endpoint one page at a time, stopping at the first short page.
+
+    Pages bypass the request memo, so only the current one is held in memory.
+    """
+    separator = "&" if "?" in endpoint else "?"
+    page = 1
+    while True:
+        items = gh_json(["api", f"{endpoint}{separator}per_page={per_page}&page={page}"])
+        if not isinstance(items, list):
+            raise RuntimeError(f"Expected a list from {endpoint}")
+        yield items
+        if len(items) < per_page:
+            return
+        page += 1
+
+
+def iter_projected(endpoint: str, fields: Tuple[str, ...], per_page: int = PAGE_SIZE) -> Iterator[Dict]:
+    """Stream items from a paginated endpoint, keeping only `fields` of each."""
+    for items in iter_pages(endpoint, per_page):
+        for item in items:
+            yield {field: item.get(field) for field in fields}
+
+
+def sum_repo_stars(user: str) -> Tuple[int, int]:
+    """Total stars and public repo count, holding at most one page of repos in memory."""
+    stars = 0
+    public = 0
+    for repo in iter_projected(f"/users/{user}/repos", REPO_FIELDS):
+        stars += repo["stargazers_count"] or 0
+        if repo["visibility"] == "public":
+            public += 1
+    return stars, public
+
+
+def get_total_stars(user: str) -> str:
+    return metric_text(user, "total_stars")
+
+
+def get_public_repos(user: str) -> str:
+    return metric_text(user, "public_repos")
+
+
+def get_followers(user: str) -> str:
+    return metric_text(user, "followers")
+
+
+def get_following(user: str) -> str:
+    return metric_text(user, "following")
+
+
+def list_open_issue_titles(repo: str, label: Optional[str] = None) -> List[str]:
+    """Titles of every open issue (not PR) in `repo`, read page by page."""
+    endpoint = f"/repos/{repo}/issues?state=open"
+    if label:
+        endpoint += f"&labels={urllib.parse.quote(label)}"
+    return [str(i["title"] or "") for i in iter_projected(endpoint, ("title", "pull_request")) if i["pull_request"] is None]
+
+
+def title_key(title: str) -> str:
+    """Hash of a normalized issue title, so case and spacing differences still match."""
+    return hashlib.sha1(" ".join(title.split()).casefold().encode()).hexdigest()
+
+
+def existing_title_keys(repo: str, wanted: List[str]) -> set:
+    """Title hashes of open issues, reading the full index only when the labelled one misses some."""
+    keys = {title_key(t) for t in list_open_issue_titles(repo, SEED_LABEL)}
+    if all(title_key(t) in keys for t in wanted):
+        return keys
+    # Issues seeded before the marker label existed only show up in the full index.
+    return keys | {title_key(t) for t in list_open_issue_titles(repo)}
+
+
+def ensure_seed_label(repo: str) -> bool:
+    proc = run(["gh", "label", "create", SEED_LABEL, "--repo", repo, "--color", "0e8a16",
+                "--description", "Created by earn_achievements.py seed", "--force"], check=False)
+    return proc.returncode == 0
+
+
+def search_contributions(user: str, since: str, until: str) -> int:
+    """PRs, issues and approved PRs created between two dates, per the search API."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    created = f"created:{since}..{until}"
+    queries = [
+        f"q=is:pr author:{user} {created}",
+        f"q=is:issue author:{user} {created}",
+        f"q=is:pr review:approved author:{user} {created}",
+    ]
+    def count(q: str) -> Dict:
+        return gh_json(["api", "/search/issues", "--method", "GET", "-f", q])
+
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        results = list(pool.map(carry(count), queries))
+    return sum(r.get("total_count", 0) for r in results)
+
+
+def events_dir() -> Path:
+    return CONFIG_FILE.parent / "events"
+
+
+def contribution_weight(event: Dict) -> int:
+    """How many contributions an event adds to the profile calendar."""
+    kind = event.get("type")
+    payload = event.get("payload") or {}
+    if kind == "PushEvent":
+        return int(payload.get("distinct_size", payload.get("size", 1)) or 0)
+    if kind in ("PullRequestEvent", "IssuesEvent"):
+        return 1 if payload.get("action") == "opened" else 0
+    if kind == "PullRequestReviewEvent":
+        return 1
+    if kind == "CreateEvent":
+        return 1 if payload.get("ref_type") == "repository" else 0
+    return 0
+
+
+_event_store_locks: Dict[str, threading.Lock] = {}
+_event_store_locks_guard = threading.Lock()
+
+
+class EventStore:
+    """Append-only local log of a user's public events, ingested incrementally.
+
+    `<user>.jsonl` holds one projected event per line, oldest first. `<user>.state.json`
+    remembers the newest event id ingested, when local coverage starts, running
+    contribution totals per year, and search baselines for the part of a year before
+    coverage started.
+    """
+
+    def __init__(self, user: str, directory: Optional[Path] = None) -> None:
+        directory = directory or events_dir()
+        self.user = user
+        self.path = directory / f"{user}.jsonl"
+        self.state_path = directory / f"{user}.state.json"
+        self.state = self._load()
+        with _event_store_locks_guard:
+            self.lock = _event_store_locks.setdefault(str(self.path), threading.Lock())
+
+    def _load(self) -> Dict:
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def save(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def ingest(self) -> int:
+        """Fetch events newer than the last one seen and append them; returns how many."""
+        with self.lock:
+            # Another store object for this user may have ingested since we loaded.
+            self.state = self._load()
+            newest = int(self.state.get("newest_id", 0))
+            fresh: List[Dict] = []
+            reached = False
+            for page, items in enumerate(iter_pages(f"/users/{self.user}/events"), 1):
+                for event in items:
+                    if int(event["id"]) <= newest:
+                        reached = True
+                        break
+                    fresh.append({
+                        "id": str(event["id"]),
+                        "type": event.get("type"),
+                        "created_at": event.get("created_at", ""),
+                        "weight": contribution_weight(event),
+                    })
+                if reached or page >= EVENTS_MAX_PAGES:
+                    break
+
+            if newest and fresh and not reached:
+                # Older activity has already aged out of the 300-event window.
+                self.state["gaps"] = self.state.get("gaps", 0) + 1
+            if fresh:
+                fresh.reverse()
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a") as f:
+                    for event in fresh:
+                        f.write(json.dumps(event) + "\n")
+                totals = self.state.setdefault("totals", {})
+                for event in fresh:
+                    year = event["created_at"][:4]
+                    totals[year] = totals.get(year, 0) + event["weight"]
+                self.state["newest_id"] = fresh[-1]["id"]
+            if "coverage_start" not in self.state:
+                self.state["coverage_start"] = fresh[0]["created_at"] if fresh else current_time(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            self.save()
+            return len(fresh)
+
+    def year_total(self, year: int) -> int:
+        """Contributions in `year`: local events plus a one-off search baseline for any
+        part of the year before local coverage started."""
+        total = int(self.state.get("totals", {}).get(str(year), 0))
+        start = str(self.state.get("coverage_start", ""))
+        if not start or start[:10] <= f"{year}-01-01":
+            return total
+        baselines = self.state.setdefault("baselines", {})
+        if str(year) not in baselines:
+            until = datetime.strptime(start[:10], "%Y-%m-%d") - timedelta(days=1)
+            baselines[str(year)] = search_contributions(self.user, f"{year}-01-01", until.strftime("%Y-%m-%d")) if until.year == year else 0
+            with self.lock:
+                self.save()
+        return total + int(baselines[str(year)])
+
+
+def get_year_contributions(user: str) -> str:
+    return metric_text(user, "year_contributions")
+
+
+def get_total_contributions(user: str) -> str:
+    return metric_text(user, "contributions")
+
+
+def get_total_prs(user: str) -> str:
+    return metric_text(user, "total_prs")
+
+
+def get_total_issues(user: str) -> str:
+    return metric_text(user, "total_issues")
+
+
+def get_gists_count(user: str) -> str:
+    return metric_text(user, "gists")
+
+
+# Metric -> (scope, GraphQL selection, search query template). Search counts are
+# top-level aliases whose query string is passed as a variable of the same name.
+GRAPHQL_METRICS: Dict[str, Tuple[str, str, str]] = {
+    "merged_prs": ("search", "", SEARCH_QUERIES["merged_prs"]),
+    "total_prs": ("search", "", SEARCH_QUERIES["total_prs"]),
+    "total_issues": ("search", "", SEARCH_QUERIES["total_issues"]),
+    "followers": ("user", "followers { totalCount }", ""),
+    "following": ("user", "following { totalCount }", ""),
+    "public_repos": ("user", "repositories(privacy: PUBLIC, ownerAffiliations: OWNER) { totalCount }", ""),
+    "gists": ("user", "gists(privacy: PUBLIC) { totalCount }", ""),
+    "accepted_answers": ("user", "repositoryDiscussionComments(onlyAnswers: true) { totalCount }", ""),
+    "total_stars": ("user", "repositories(first: 100, privacy: PUBLIC, ownerAffiliations: OWNER, after: $cursor) "
+                            "{ nodes { stargazerCount } pageInfo { hasNextPage endCursor } }", ""),
+    "year_contributions": ("user", "contributionsCollection(from: $from) { contributionCalendar { totalContributions } }", ""),
+}
+
+ANSWERS_QUERY = """query($login: String!) {
+  user(login: $login) { accepted_answers: %s }
+}""" % GRAPHQL_METRICS["accepted_answers"][1]
+
+STARS_PAGE_QUERY = """query($login: String!, $cursor: String) {
+  user(login: $login) { total_stars: %s }
+}""" % GRAPHQL_METRICS["total_stars"][1]
 
 
-def load_config() -> Dict:
-    ensure_config_dir()
-    if CONFIG_FILE.exists():
-        with open(CONFIG_FILE) as f:
-            return json.load(f)
-    return DEFAULT_CONFIG.copy()
+def build_graphql_query(metrics: List[str]) -> Tuple[str, Dict[str, str]]:
+    """One aliased query covering every requested metric that GraphQL can answer."""
+    params = ["$login: String!"]
+    variables: Dict[str, str] = {}
+    user_fields = []
+    root_fields = []
+    for name in metrics:
+        scope, selection, search = GRAPHQL_METRICS[name]
+        if scope == "search":
+            params.append(f"${name}: String!")
+            variables[name] = search
+            root_fields.append(f"{name}: search(query: ${name}, type: ISSUE) {{ issueCount }}")
+        else:
+            user_fields.append(f"{name}: {selection}")
+    if "total_stars" in metrics:
+        params.append("$cursor: String")
+    if "year_contributions" in metrics:
+        params.append("$from: DateTime")
+    lines = [f"query({', '.join(params)}) {{"]
+    if user_fields:
+        lines.append("  user(login: $login) { " + " ".join(user_fields) + " }")
+    lines += [f"  {field}" for field in root_fields]
+    lines.append("}")
+    return "\n".join(lines), variables
 
 
-def save_config(config: Dict) -> None:
-    ensure_config_dir()
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config, f, indent=2)
+def checked_search_count(query: str, issue_count: int) -> int:
+    """GraphQL's issueCount has no incomplete_results flag, so large counts, and queries
+    already known to need sharding, are recounted through search_count."""
+    if issue_count < SEARCH_SHARD_TARGET and not ShardCache().granularity(query):
+        return issue_count
+    return search_count(query)
 
 
-def get_config_value(key: str, default=None):
-    config = load_config()
-    keys = key.split(".")
-    value = config
-    for k in keys:
-        if isinstance(value, dict):
-            value = value.get(k, default)
+def fetch_graphql_metrics(user: str, metrics: List[str]) -> Dict[str, int]:
+    """Fetch `metrics` in one GraphQL round trip (plus extra pages for large star counts)."""
+    metrics = [m for m in metrics if m in GRAPHQL_METRICS]
+    if not metrics:
+        return {}
+    query, variables = build_graphql_query(metrics)
+    args = ["api", "graphql", "-f", f"query={query}", "-f", f"login={user}"]
+    for name, template in variables.items():
+        args += ["-f", f"{name}={template.format(user=user)}"]
+    if "year_contributions" in metrics:
+        args += ["-f", f"from={current_time().year}-01-01T00:00:00Z"]
+    data = gh_json(args)["data"]
+    profile = data.get("user") or {}
+
+    results: Dict[str, int] = {}
+    for name in metrics:
+        scope, _, _ = GRAPHQL_METRICS[name]
+        if scope == "search":
+            results[name] = checked_search_count(variables[name].format(user=user), int(data[name]["issueCount"]))
+        elif name == "total_stars":
+            connection = profile[name]
+            total = sum(node["stargazerCount"] for node in connection["nodes"])
+            while connection["pageInfo"]["hasNextPage"]:
+                page = gh_json(["api", "graphql", "-f", f"query={STARS_PAGE_QUERY}", "-f", f"login={user}",
+                                "-f", f"cursor={connection['pageInfo']['endCursor']}"])
+                connection = page["data"]["user"][name]
+                total += sum(node["stargazerCount"] for node in connection["nodes"])
+            results[name] = total
+        elif name == "year_contributions":
+            results[name] = int(profile[name]["contributionCalendar"]["totalContributions"])
         else:
-            return default
-    return value
+            results[name] = int(profile[name]["totalCount"])
+    return results
 
 
-def run(cmd: List[str], check: bool = True) -> subprocess.CompletedProcess:
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if check and result.returncode != 0:
-        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
-    return result
+MERGED_PRS_QUERY = """query($q: String!, $cursor: String) {
+  search(query: $q, type: ISSUE, first: 50, after: $cursor) {
+    issueCount
+    nodes { ... on PullRequest { id mergedAt commits(first: 100) { nodes { commit { id oid } } } } }
+    pageInfo { hasNextPage endCursor }
+  }
+}"""
+NODE_BATCH = 100  # node(id:) lookups aliased into one GraphQL query
+SEARCH_RESULT_CAP = 1000  # search never returns more results than this for one query
+COAUTHOR_TRAILER = re.compile(r"^co-authored-by:[ \t]*(.+?)[ \t]*$", re.IGNORECASE | re.MULTILINE)
 
 
-def gh_json(args: List[str]) -> Dict:
-    proc = run(["gh"] + args, check=False)
-    if proc.returncode != 0:
-        raise RuntimeError(proc.stderr.strip() or proc.stdout.strip())
-    return json.loads(proc.stdout)
+def coauthor_trailers(message: str) -> List[str]:
+    """Values of the `Co-authored-by:` trailers in a commit message."""
+    return COAUTHOR_TRAILER.findall(message)
 
 
-def check_gh_installed() -> bool:
-    try:
-        run(["gh", "--version"], check=False)
-        return True
-    except FileNotFoundError:
-        return False
+def is_self_trailer(trailer: str, user: str) -> bool:
+    """Whether a trailer names `user`, by login or GitHub noreply address (`[id+]login@...`)."""
+    name, _, email = trailer.partition("<")
+    local, _, domain = email.rstrip(">").strip().casefold().partition("@")
+    login = user.casefold()
+    return name.strip().casefold() == login or (domain == "users.noreply.github.com"
+                                                 and local.split("+")[-1] == login)
 
 
-def list_open_issue_titles(repo: str) -> List[str]:
-    data = gh_json(["issue", "list", "--repo", repo, "--state", "open", "--json", "title"])
-    return [str(i.get("title", "")) for i in data]
+def trailers_dir() -> Path:
+    return CONFIG_FILE.parent / "trailers"
 
 
-def get_merged_prs_count(user: str) -> str:
-    try:
-        data = gh_json(["api", "/search/issues", "-f", f"q=is:pr is:merged author:{user}"])
-        return str(data.get("total_count", 0))  # type: ignore[arg-type]
-    except Exception:
-        return "(unavailable)"
+_commit_cache_lock = threading.Lock()
 
 
-def get_coauthored_prs_count(user: str) -> str:
-    try:
-        data = gh_json(["api", "/search/issues", "-f", f"q=is:pr is:merged author:{user} co-authored-by:{user}"])
-        return str(data.get("total_count", 0))  # type: ignore[arg-type]
-    except Exception:
-        return "(unavailable)"
+class CommitTrailerCache:
+    """Co-author trailers of every commit scanned, keyed by SHA. Commits never change,
+    so entries never expire and are shared between users."""
 
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path or trailers_dir() / "commits.json"
+        try:
+            with open(self.path) as f:
+                self.trailers: Dict[str, List[str]] = json.load(f)
+        except (OSError, ValueError):
+            self.trailers = {}
 
-def get_total_stars(user: str) -> str:
-    try:
-        repos = gh_json(["api", f"/users/{user}/repos", "--paginate"])
-        total = sum(r.get("stargazers_count", 0) for r in repos)
-        return str(total)
-    except Exception:
-        return "(unavailable)"
+    def save(self) -> None:
+        # Several users may be scanned at once, so merge with what they saved meanwhile.
+        with _commit_cache_lock:
+            self.trailers = {**CommitTrailerCache(self.path).trailers, **self.trailers}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self.trailers, f, sort_keys=True)
+            os.replace(tmp, self.path)
 
 
-def get_public_repos(user: str) -> str:
-    try:
-        data = gh_json(["api", f"/users/{user}"])
-        return str(data.get("public_repos", 0))  # type: ignore[arg-type]
-    except Exception:
-        return "(unavailable)"
+class TrailerScanner:
+    """Counts a user's merged PRs with a commit carrying someone else's `Co-authored-by:`
+    trailer, which is what Pair Extraordinaire counts.
 
+    `users/<user>.json` remembers, per PR node id, whether it qualified and the latest merge
+    date seen, so a scan only searches PRs merged since then. Commit messages are only
+    fetched for SHAs missing from the CommitTrailerCache.
+    """
 
-def get_followers(user: str) -> str:
-    try:
-        data = gh_json(["api", f"/users/{user}"])
-        return str(data.get("followers", 0))  # type: ignore[arg-type]
-    except Exception:
-        return "(unavailable)"
+    def __init__(self, user: str, directory: Optional[Path] = None) -> None:
+        directory = directory or trailers_dir()
+        self.user = user
+        # Per-user files live apart from the shared cache, so a user named "commits" can't clash.
+        self.path = directory / "users" / f"{user}.json"
+        self.commits = CommitTrailerCache(directory / "commits.json")
+        try:
+            with open(self.path) as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
 
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
 
-def get_following(user: str) -> str:
-    try:
-        data = gh_json(["api", f"/users/{user}"])
-        return str(data.get("following", 0))  # type: ignore[arg-type]
-    except Exception:
-        return "(unavailable)"
+    def _merged_prs(self, window: Tuple[date, date]) -> Optional[List[Dict]]:
+        """PRs merged within `window`, or None if there are more than search will return
+        and the window spans more than one year."""
+        query = f"is:pr is:merged author:{self.user} merged:{window[0].isoformat()}..{window[1].isoformat()}"
+        prs: List[Dict] = []
+        cursor = None
+        while True:
+            args = ["api", "graphql", "-f", f"query={MERGED_PRS_QUERY}", "-f", f"q={query}"]
+            if cursor:
+                args += ["-f", f"cursor={cursor}"]
+            page = gh_json(args)["data"]["search"]
+            if page.get("issueCount", 0) > SEARCH_RESULT_CAP and window[0].year < window[1].year:
+                return None
+            prs += [node for node in page["nodes"] if node]
+            if not page["pageInfo"]["hasNextPage"]:
+                return prs
+            cursor = page["pageInfo"]["endCursor"]
 
+    def _fetch_messages(self, commits: List[Dict]) -> Dict[str, List[str]]:
+        fields = " ".join(f"c{i}: node(id: {json.dumps(c['id'])}) {{ ... on Commit {{ oid message }} }}"
+                          for i, c in enumerate(commits))
+        data = gh_json(["api", "graphql", "-f", f"query=query {{ {fields} }}"])["data"]
+        return {node["oid"]: coauthor_trailers(node["message"]) for node in data.values() if node}
 
-def get_year_contributions(user: str) -> str:
-    """Get total contributions for the current year using search API."""
-    try:
-        from datetime import datetime
-        year = datetime.now().year
-        
-        total = 0
-        
-        prs = gh_json(["api", "/search/issues", "-f", f"q=is:pr author:{user} created:{year}-01-01..{year}-12-31"])
-        total += prs.get("total_count", 0)
-        
-        issues = gh_json(["api", "/search/issues", "-f", f"q=is:issue author:{user} created:{year}-01-01..{year}-12-31"])
-        total += issues.get("total_count", 0)
-        
-        reviews = gh_json(["api", "/search/issues", "-f", f"q=is:pr review:approved author:{user} created:{year}-01-01..{year}-12-31"])
-        total += reviews.get("total_count", 0)
-        
-        return str(total)
-    except Exception:
-        return "(unavailable)"
+    def scan(self) -> int:
+        """Look at PRs merged since the last scan; returns the total qualifying PRs."""
+        from concurrent.futures import ThreadPoolExecutor
 
+        prs_state: Dict[str, bool] = self.state.setdefault("prs", {})
+        merged_since = self.state.get("merged_since")
+        start = date.fromisoformat(merged_since) if merged_since else SEARCH_EPOCH
+        today = current_time(timezone.utc).date()
+        windows = [(start, today)]
+        prs: List[Dict] = []
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            while windows:
+                results = list(zip(windows, pool.map(carry(self._merged_prs), windows)))
+                windows = []
+                for window, found in results:
+                    if found is None:
+                        # Too many to page through at once: search a year at a time.
+                        windows += date_shards(window[0], window[1], "year")
+                    else:
+                        prs += found
+            pending: Dict[str, Dict] = {}
+            for pr in prs:
+                for node in pr["commits"]["nodes"]:
+                    if node["commit"]["oid"] not in self.commits.trailers:
+                        pending[node["commit"]["oid"]] = node["commit"]
+            batches = [list(pending.values())[i:i + NODE_BATCH] for i in range(0, len(pending), NODE_BATCH)]
+            for found in pool.map(carry(self._fetch_messages), batches):
+                self.commits.trailers.update(found)
+        if pending:
+            self.commits.save()
 
-def get_total_contributions(user: str) -> str:
-    try:
-        data = gh_json(["api", f"/users/{user}/events?per_page=100"])
-        contributions = 0
-        for event in data:
-            if event.get("type") in ["PushEvent", "PullRequestEvent", "IssuesEvent", "IssueCommentEvent"]:
-                contributions += 1
-        return f"~{contributions} (last 100 events)"
-    except Exception:
-        return "(unavailable)"
+        for pr in prs:
+            prs_state[pr["id"]] = any(
+                not is_self_trailer(trailer, self.user)
+                for node in pr["commits"]["nodes"]
+                for trailer in self.commits.trailers.get(node["commit"]["oid"], []))
+            merged = pr["mergedAt"][:10]
+            if merged > self.state.get("merged_since", ""):
+                self.state["merged_since"] = merged
+        self.save()
+        return sum(1 for qualifies in prs_state.values() if qualifies)
 
 
-def get_total_prs(user: str) -> str:
+QUICKDRAW_SECONDS = 5 * 60
+# Connection -> fields the badge scan needs from each item.
+BADGE_CONNECTIONS = {
+    "issues": "createdAt closedAt",
+    "pullRequests": "createdAt closedAt mergedAt reviews { totalCount }",
+}
+BADGE_NODE_FIELDS = ("... on Issue { id %s } ... on PullRequest { id %s }"
+                     % (BADGE_CONNECTIONS["issues"], BADGE_CONNECTIONS["pullRequests"]))
+
+
+def badge_page_query(connections: List[str]) -> str:
+    """The next page of each of `connections`, oldest first, resuming after its cursor."""
+    params = ["$login: String!"] + [f"${name}: String" for name in connections]
+    fields = " ".join(f"{name}(first: 100, after: ${name}, orderBy: {{field: CREATED_AT, direction: ASC}}) "
+                      f"{{ nodes {{ id {BADGE_CONNECTIONS[name]} }} pageInfo {{ hasNextPage endCursor }} }}"
+                      for name in connections)
+    return f"query({', '.join(params)}) {{\n  user(login: $login) {{ {fields} }}\n}}"
+
+
+def parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def is_quickdraw(item: Dict) -> bool:
+    closed = item.get("closedAt")
+    return bool(closed) and (parse_timestamp(closed) - parse_timestamp(item["createdAt"])).total_seconds() <= QUICKDRAW_SECONDS
+
+
+def is_yolo(item: Dict) -> bool:
+    return bool(item.get("mergedAt")) and item.get("reviews", {}).get("totalCount", 0) == 0
+
+
+def badges_dir() -> Path:
+    return CONFIG_FILE.parent / "badges"
+
+
+class BadgeDetector:
+    """Counts a user's Quickdraw items (issues or PRs closed within 5 minutes of being
+    opened) and YOLO PRs (merged with no reviews).
+
+    `<user>.json` keeps the counts, a cursor into each connection, and the ids of items
+    that could still qualify later: open PRs, and issues opened under 5 minutes ago.
+    A run pages through items created since the cursors and rechecks only those ids.
+    """
+
+    def __init__(self, user: str, directory: Optional[Path] = None) -> None:
+        self.user = user
+        self.path = (directory or badges_dir()) / f"{user}.json"
+        try:
+            with open(self.path) as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+
+        self.pending: List[str] = []
+
+    def save(self, pending: List[str]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({**self.state, "pending": pending}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def _classify(self, item: Dict, now: datetime) -> None:
+        if is_quickdraw(item):
+            self.state["quickdraw"] = self.state.get("quickdraw", 0) + 1
+        if is_yolo(item):
+            self.state["yolo"] = self.state.get("yolo", 0) + 1
+        # Only PRs have reviews; an open one may still be merged without any.
+        opened = (now - parse_timestamp(item["createdAt"])).total_seconds()
+        if not item.get("closedAt") and ("reviews" in item or opened < QUICKDRAW_SECONDS):
+            self.pending.append(item["id"])
+
+    def _fetch_nodes(self, ids: List[str]) -> List[Dict]:
+        fields = " ".join(f"n{i}: node(id: {json.dumps(node_id)}) {{ {BADGE_NODE_FIELDS} }}"
+                          for i, node_id in enumerate(ids))
+        data = gh_json(["api", "graphql", "-f", f"query=query {{ {fields} }}"])["data"]
+        return [node for node in data.values() if node]
+
+    def scan(self) -> Dict[str, int]:
+        """Classify items created since the last scan and recheck pending ones."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        now = current_time(timezone.utc)
+        pending = self.state.get("pending", [])
+        batches = [pending[i:i + NODE_BATCH] for i in range(0, len(pending), NODE_BATCH)]
+        cursors: Dict[str, Optional[str]] = self.state.setdefault("cursors", {})
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            # Pending items are rechecked while the new ones are paged through.
+            rechecked = pool.map(carry(self._fetch_nodes), batches)
+            remaining = list(BADGE_CONNECTIONS)
+            while remaining:
+                args = ["api", "graphql", "-f", f"query={badge_page_query(remaining)}", "-f", f"login={self.user}"]
+                args += [arg for name in remaining if cursors.get(name) for arg in ("-f", f"{name}={cursors[name]}")]
+                user = gh_json(args)["data"]["user"]
+                if user is None:
+                    raise RuntimeError(f"No such user: {self.user}")
+                for name in list(remaining):
+                    connection = user[name]
+                    for item in connection["nodes"]:
+                        self._classify(item, now)
+                    if connection["pageInfo"]["endCursor"]:
+                        cursors[name] = connection["pageInfo"]["endCursor"]
+                    if not connection["pageInfo"]["hasNextPage"]:
+                        remaining.remove(name)
+                # Saved page by page so an interrupted first scan of a big account resumes;
+                # the old pending ids stay until their recheck is in.
+                self.save(pending + self.pending)
+            found = [node for nodes in rechecked for node in nodes]
+        for item in found:
+            self._classify(item, now)
+        self.state["pending"] = self.pending
+        self.save(self.pending)
+        return {"quickdraw": int(self.state.get("quickdraw", 0)), "yolo": int(self.state.get("yolo", 0))}
+
+
+class MetricSource(NamedTuple):
+    """One way of fetching some metrics: `fetch(user, metrics)` returns their values."""
+
+    name: str
+    metrics: Tuple[str, ...]
+    cost: float
+    fetch: Callable[[str, List[str]], Dict[str, object]]
+
+
+def _fetch_profile_metrics(user: str, metrics: List[str]) -> Dict[str, object]:
+    profile = fetch_profile(user)
+    fields = {"public_repos": "public_repos", "followers": "followers", "following": "following", "gists": "public_gists"}
+    return {name: int(profile.get(fields[name], 0)) for name in metrics}
+
+
+def _fetch_answer_metrics(user: str, metrics: List[str]) -> Dict[str, object]:
+    # Counted rather than paged: a comment can be marked as the answer long after it was
+    # written, so a cursor over comments would miss answers accepted behind it.
+    profile = gh_json(["api", "graphql", "-f", f"query={ANSWERS_QUERY}", "-f", f"login={user}"])["data"]["user"]
+    if profile is None:
+        raise RuntimeError(f"No such user: {user}")
+    return {"accepted_answers": int(profile["accepted_answers"]["totalCount"])}
+
+
+def _fetch_repo_metrics(user: str, metrics: List[str]) -> Dict[str, object]:
+    stars, _ = sum_repo_stars(user)
+    return {"total_stars": stars}
+
+
+def _fetch_event_metrics(user: str, metrics: List[str]) -> Dict[str, object]:
+    store = EventStore(user)
+    store.ingest()
+    results: Dict[str, object] = {}
+    if "year_contributions" in metrics:
+        results["year_contributions"] = store.year_total(current_time().year)
+    if "contributions" in metrics:
+        total = sum(int(v) for v in store.state.get("totals", {}).values())
+        results["contributions"] = f"{total} (since {store.state['coverage_start'][:10]})"
+    return results
+
+
+def _search_source(metric: str) -> MetricSource:
+    return MetricSource(f"search:{metric}", (metric,), SEARCH_COST,
+                        lambda user, metrics: {metric: search_count(SEARCH_QUERIES[metric].format(user=user))})
+
+
+def metric_sources(user: str, source: str = "auto", max_age: Optional[int] = None) -> List[MetricSource]:
+    """Every source that could answer a metric for `user`, with its estimated cost in API calls.
+
+    `source` restricts the choice: "graphql" never uses REST for a metric GraphQL can
+    answer, "rest" never uses GraphQL. With `max_age`, recorded snapshots no older than
+    that many seconds are a free source.
+    """
+    sources: List[MetricSource] = []
+    if max_age is not None:
+        store = SnapshotStore()
+        try:
+            ts, latest = store.latest(user)
+        finally:
+            store.close()
+        if ts is not None and time.time() - ts <= max_age:
+            sources.append(MetricSource("snapshot", tuple(latest), 0.0,
+                                        lambda user, metrics: {m: latest[m] for m in metrics}))
+    if source != "rest":
+        sources.append(MetricSource("graphql", tuple(GRAPHQL_METRICS), 1.0, fetch_graphql_metrics))
+    rest = [
+        # The profile is free when `gh api user` already fetched it in this run.
+        MetricSource("profile", ("public_repos", "followers", "following", "gists"),
+                     0.1 if current_memo() is not None and current_memo().has(["api", f"/users/{user}"]) else 1.0,
+                     _fetch_profile_metrics),
+        MetricSource("repos", ("total_stars",), 2.0, _fetch_repo_metrics),
+        MetricSource("events", ("contributions", "year_contributions"), 1.5, _fetch_event_metrics),
+        MetricSource("trailers", ("coauthored_prs",), 1.5,
+                     lambda user, metrics: {"coauthored_prs": TrailerScanner(user).scan()}),
+        MetricSource("badges", ("quickdraw", "yolo"), 1.5, lambda user, metrics: BadgeDetector(user).scan()),
+        MetricSource("answers", ("accepted_answers",), 1.0, _fetch_answer_metrics),
+    ] + [_search_source(metric) for metric in SEARCH_QUERIES]
+    for candidate in rest:
+        metrics = tuple(m for m in candidate.metrics if source != "graphql" or m not in GRAPHQL_METRICS)
+        if metrics:
+            sources.append(candidate._replace(metrics=metrics))
+    return sources
+
+
+def plan_metrics(metrics: List[str], sources: List[MetricSource]) -> List[Tuple[MetricSource, List[str]]]:
+    """Cheapest set of sources covering `metrics` (greedy weighted set cover).
+
+    Returns (source, metrics it should fetch) pairs; metrics no source can answer are
+    left out.
+    """
+    uncovered = [m for m in metrics]
+    plan: List[Tuple[MetricSource, List[str]]] = []
+    candidates = list(sources)
+    while uncovered and candidates:
+        def score(candidate: MetricSource) -> float:
+            covered = sum(1 for m in uncovered if m in candidate.metrics)
+            return candidate.cost / covered if covered else float("inf")
+
+        best = min(candidates, key=score)
+        if score(best) == float("inf"):
+            break
+        assigned = [m for m in uncovered if m in best.metrics]
+        plan.append((best, assigned))
+        uncovered = [m for m in uncovered if m not in assigned]
+        candidates.remove(best)
+    return plan
+
+
+def _fetch_source(step: MetricSource, user: str, metrics: List[str]) -> Dict[str, object]:
+    tracer = _tracer
+    if tracer is None:
+        return step.fetch(user, metrics)
+    with tracer.span(step.name, "metric", metric=",".join(metrics), user=user):
+        return step.fetch(user, metrics)
+
+
+def collect_metrics(user: str, metrics: List[str], source: str = "auto", max_workers: Optional[int] = None,
+                    max_age: Optional[int] = None) -> Dict[str, object]:
+    """Fetch `metrics` for `user` with the cheapest plan, replanning around failed sources.
+
+    Metrics that no working source could answer are missing from the result.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if max_workers is None:
+        max_workers = int(get_config_value("max_workers", MAX_WORKERS))
+    sources = metric_sources(user, source, max_age)
+    results: Dict[str, object] = {}
+    remaining = list(metrics)
+    while remaining:
+        plan = plan_metrics(remaining, sources)
+        if not plan:
+            break
+        failed = set()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(plan)))) as pool:
+            fetch = carry(_fetch_source)
+            futures = [(step, assigned, pool.submit(fetch, step, user, assigned)) for step, assigned in plan]
+            for step, assigned, future in futures:
+                try:
+                    values = future.result()
+                except Exception:
+                    failed.add(step.name)
+                    continue
+                results.update({m: values[m] for m in assigned if m in values})
+        sources = [s for s in sources if s.name not in failed and s.name not in {step.name for step, _ in plan}]
+        remaining = [m for m in remaining if m not in results]
+    return results
+
+
+STATUS_METRICS = (
+    "merged_prs",
+    "coauthored_prs",
+    "total_stars",
+    "public_repos",
+    "followers",
+    "following",
+    "contributions",
+    "year_contributions",
+    "total_prs",
+    "total_issues",
+    "gists",
+    "quickdraw",
+    "yolo",
+    "accepted_answers",
+)
+
+
+def last_good_dir() -> Path:
+    return CONFIG_FILE.parent / "last-good"
+
+
+def stale_ttl(metric: str) -> int:
+    ttl = get_config_value(f"stale_ttl.{metric}", None)
+    if ttl is None:
+        ttl = get_config_value("stale_ttl.default", STALE_TTL.get(metric, STALE_TTL["default"]))
+    return int(ttl)
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 3600:
+        return f"{max(1, int(seconds // 60))}m"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h"
+    return f"{int(seconds // 86400)}d"
+
+
+class LastGoodStore:
+    """The most recent successfully fetched value of each metric for one user, with its time."""
+
+    def __init__(self, user: str, directory: Optional[Path] = None) -> None:
+        self.path = (directory or last_good_dir()) / f"{user}.json"
+        try:
+            with open(self.path) as f:
+                self.values: Dict[str, Dict] = json.load(f)
+        except (OSError, ValueError):
+            self.values = {}
+
+    def update(self, values: Dict[str, object]) -> None:
+        ts = current_time().timestamp()
+        changed = False
+        for metric, value in values.items():
+            if isinstance(value, (int, str)):
+                self.values[metric] = {"value": value, "ts": ts}
+                changed = True
+        if changed:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self.values, f, indent=2)
+            os.replace(tmp, self.path)
+
+    def get(self, metric: str) -> Optional[Tuple[object, float]]:
+        """(value, age in seconds) if a value within the metric's TTL is stored."""
+        entry = self.values.get(metric)
+        if entry is None:
+            return None
+        age = current_time().timestamp() - entry["ts"]
+        return (entry["value"], age) if age <= stale_ttl(metric) else None
+
+
+def collect_or_stale(user: str, metrics: List[str], source: str = "auto",
+                     max_workers: Optional[int] = None) -> Tuple[Dict[str, object], Dict[str, float]]:
+    """collect_metrics, falling back to last-known-good values for metrics that failed.
+
+    Returns (values, {metric: age in seconds} for the stale ones). Fresh values are
+    remembered for the next run, which is also when stale ones get refreshed.
+    """
+    values = collect_metrics(user, metrics, source, max_workers)
+    store = LastGoodStore(user)
+    store.update(values)
+    stale: Dict[str, float] = {}
+    for metric in metrics:
+        if metric not in values:
+            hit = store.get(metric)
+            if hit is not None:
+                values[metric], stale[metric] = hit
+    return values, stale
+
+
+def metric_text(user: str, metric: str, source: str = "rest") -> str:
+    """One metric as display text through the planner, "(unavailable)" if nothing answers it.
+
+    Backs the get_* helpers, which have always read REST (plus the scanners), so a plain
+    token without GraphQL access still works.
+    """
+    values = collect_metrics(user, [metric], source)
+    return str(values[metric]) if metric in values else "(unavailable)"
+
+
+def fetch_status_metrics(user: str, max_workers: Optional[int] = None, source: str = "auto") -> Dict[str, str]:
+    """Every status metric as display text: a stale value marked with its age where the
+    fetch failed, "(unavailable)" where nothing is known."""
+    values, stale = collect_or_stale(user, list(STATUS_METRICS), source, max_workers)
+    text = {}
+    for name in STATUS_METRICS:
+        if name not in values:
+            text[name] = "(unavailable)"
+        elif name in stale:
+            text[name] = f"{values[name]} (stale, {format_age(stale[name])} old)"
+        else:
+            text[name] = str(values[name])
+    return text
+
+
+# Achievement -> the metric its tiers are measured against.
+ACHIEVEMENT_METRICS = {
+    "pull_shark": "merged_prs",
+    "pair_extraordinaire": "coauthored_prs",
+    "starstruck": "total_stars",
+    "llama": "year_contributions",
+    "quickdraw": "quickdraw",
+    "yolo": "yolo",
+    "galaxy_brain": "accepted_answers",
+}
+
+
+def achievement_thresholds(achievement: str) -> List[int]:
+    default = DEFAULT_CONFIG["achievements"].get(achievement, {}).get("threshold", [])
+    return list(get_config_value(f"achievements.{achievement}.threshold", default) or [])
+
+
+def achievement_tier(achievement: str, value: int) -> int:
+    """Number of tiers reached (0 = not earned yet)."""
+    return sum(1 for threshold in achievement_thresholds(achievement) if value >= threshold)
+
+
+def next_threshold(achievement: str, value: int) -> Optional[int]:
+    return next((t for t in achievement_thresholds(achievement) if value < t), None)
+
+
+def history_db() -> Path:
+    return CONFIG_FILE.parent / "history.db"
+
+
+class SnapshotStore:
+    """SQLite time series of metric values, one row per (user, metric, run)."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS snapshots (
+            user TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            value INTEGER NOT NULL,
+            PRIMARY KEY (user, metric, ts)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS snapshots_by_time ON snapshots (ts);
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        import sqlite3
+
+        self.path = path or history_db()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def record(self, user: str, metrics: Dict, ts: Optional[int] = None) -> int:
+        """Store every numeric metric for `user`; returns the snapshot timestamp."""
+        ts = int(current_time().timestamp()) if ts is None else ts
+        rows = [(user, name, ts, int(value)) for name, value in metrics.items()
+                if isinstance(value, int) or (isinstance(value, str) and value.isdigit())]
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)", rows)
+        return ts
+
+    def series(self, user: str, metric: str, since: int = 0) -> List[Tuple[int, int]]:
+        cursor = self.conn.execute(
+            "SELECT ts, value FROM snapshots WHERE user = ? AND metric = ? AND ts >= ? ORDER BY ts",
+            (user, metric, since))
+        return cursor.fetchall()
+
+    def metrics(self, user: str) -> List[str]:
+        cursor = self.conn.execute("SELECT DISTINCT metric FROM snapshots WHERE user = ? ORDER BY metric", (user,))
+        return [row[0] for row in cursor]
+
+    def latest(self, user: str) -> Tuple[Optional[int], Dict[str, int]]:
+        """Most recent value of each metric and the newest timestamp among them."""
+        cursor = self.conn.execute(
+            "SELECT metric, MAX(ts), value FROM snapshots WHERE user = ? GROUP BY metric", (user,))
+        rows = cursor.fetchall()
+        if not rows:
+            return None, {}
+        return max(row[1] for row in rows), {row[0]: row[2] for row in rows}
+
+    def last_user(self) -> Optional[str]:
+        row = self.conn.execute("SELECT user FROM snapshots ORDER BY ts DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+
+def weekly_changes(series: List[Tuple[int, int]]) -> List[Tuple[str, int]]:
+    """Change in value per ISO week (last value of the week minus the previous week's)."""
+    last_by_week: "OrderedDict[str, int]" = OrderedDict()
+    for ts, value in series:
+        year, week, _ = datetime.fromtimestamp(ts).isocalendar()
+        last_by_week[f"{year}-W{week:02d}"] = value
+    changes = []
+    previous = series[0][1] if series else 0
+    for week, value in last_by_week.items():
+        changes.append((week, value - previous))
+        previous = value
+    return changes
+
+
+def days_until(series: List[Tuple[int, int]], target: int) -> Optional[float]:
+    """Linear estimate of days until the series reaches `target`, or None if it is not growing."""
+    if len(series) < 2:
+        return None
+    (first_ts, first), (last_ts, last) = series[0], series[-1]
+    if last >= target:
+        return 0.0
+    if last <= first or last_ts <= first_ts:
+        return None
+    per_day = (last - first) / ((last_ts - first_ts) / 86400)
+    return (target - last) / per_day
+
+
+def record_history(user: str, metrics: Dict) -> None:
+    import sqlite3
+
     try:
-        data = gh_json(["api", "/search/issues", "-f", f"q=is:pr author:{user}"])
-        return str(data.get("total_count", 0))  # type: ignore[arg-type]
-    except Exception:
-        return "(unavailable)"
+        store = SnapshotStore()
+        try:
+            store.record(user, metrics)
+        finally:
+            store.close()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Warning: could not record history: {e}", file=sys.stderr)
 
 
-def get_total_issues(user: str) -> str:
+def load_users_file(path: str) -> List[str]:
+    users: List[str] = []
+    with open(path) as f:
+        for line in f:
+            login = line.split("#", 1)[0].strip()
+            if login and login not in users:
+                users.append(login)
+    return users
+
+
+def list_org_members(org: str) -> List[str]:
+    return [str(member["login"]) for member in iter_projected(f"/orgs/{org}/members", ("login",))]
+
+
+def read_checkpoint(path: Path) -> Dict[str, Dict]:
+    """Records already written by an earlier (possibly interrupted) batch run, by login."""
+    done: Dict[str, Dict] = {}
+    if not path.exists():
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a run killed mid-write leaves a partial last line
+            if isinstance(record, dict) and record.get("user"):
+                done[record["user"]] = record
+    return done
+
+
+def _json_metric(value: str):
+    return int(value) if value.isdigit() else value
+
+
+def run_batch_status(users: List[str], max_workers: int = MAX_WORKERS, source: str = "auto",
+                     checkpoint: Optional[Path] = None, out=None, history: Optional[SnapshotStore] = None) -> int:
+    """Fetch status metrics for many users, printing one JSON line per user as each finishes.
+
+    Users already present in `checkpoint` are skipped, and each new record is appended
+    to it, so an interrupted scan resumes where it stopped. Submission stops early when
+    the scheduler reports an exhausted core or GraphQL budget. Returns the number of
+    users fetched in this run.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    out = out or sys.stdout
+    done = read_checkpoint(checkpoint) if checkpoint else {}
+    pending = iter([u for u in users if u not in done])
+    lock = threading.Lock()
+    fetched = 0
+
+    def fetch(login: str) -> Dict:
+        # One memo per user, so responses are freed as each user finishes.
+        with request_scope(local=True):
+            metrics = fetch_status_metrics(login, max_workers=2, source=source)
+        return {"user": login, **{name: _json_metric(value) for name, value in metrics.items()}}
+
+    def budget_left() -> bool:
+        scheduler = _scheduler
+        return scheduler is None or not (scheduler.exhausted("core") or scheduler.exhausted("graphql"))
+
+    checkpoint_file = open(checkpoint, "a") if checkpoint else None
+    if checkpoint_file and checkpoint_file.tell() > 0:
+        with open(checkpoint, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                checkpoint_file.write("\n")
     try:
-        data = gh_json(["api", "/search/issues", "-f", f"q=is:issue author:{user}"])
-        return str(data.get("total_count", 0))  # type: ignore[arg-type]
-    except Exception:
-        return "(unavailable)"
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            in_flight: Dict["Future", str] = {}
+            while True:
+                while len(in_flight) < max_workers and budget_left():
+                    login = next(pending, None)
+                    if login is None:
+                        break
+                    in_flight[pool.submit(fetch, login)] = login
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    login = in_flight.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        print(f"Error fetching {login}: {e}", file=sys.stderr)
+                        continue
+                    line = json.dumps(record, sort_keys=True)
+                    with lock:
+                        print(line, file=out, flush=True)
+                        if checkpoint_file:
+                            checkpoint_file.write(line + "\n")
+                            checkpoint_file.flush()
+                        fetched += 1
+                    if history is not None:
+                        history.record(login, record)
+    finally:
+        if checkpoint_file:
+            checkpoint_file.close()
+    return fetched
 
 
-def get_gists_count(user: str) -> str:
+def cmd_batch_status(args) -> int:
+    if args.users_file:
+        users = load_users_file(args.users_file)
+    else:
+        try:
+            users = list_org_members(args.org)
+        except RuntimeError as e:
+            print(f"Error listing members of {args.org}: {e}", file=sys.stderr)
+            return 1
+    workers = args.workers or int(get_config_value("max_workers", MAX_WORKERS))
+    checkpoint = Path(args.checkpoint) if args.checkpoint else None
+    skipped = len(set(users) & set(read_checkpoint(checkpoint))) if checkpoint else 0
+    history = None if getattr(args, "no_history", False) else SnapshotStore()
     try:
-        data = gh_json(["api", f"/users/{user}/gists"])
-        return str(len(data))  # type: ignore[arg-type]
-    except Exception:
-        return "(unavailable)"
+        fetched = run_batch_status(users, workers, args.source, checkpoint, history=history)
+    finally:
+        if history is not None:
+            history.close()
+    remaining = len(users) - fetched - skipped
+    print(f"Fetched {fetched} users ({skipped} from checkpoint, {remaining} remaining)", file=sys.stderr)
+    return 0 if remaining == 0 else 2
 
 
 def cmd_status(args):
@@ -214,9 +2469,11 @@ def cmd_status(args):
         print("Install it from: https://cli.github.com/", file=sys.stderr)
         return 1
 
+    if getattr(args, "users_file", None) or getattr(args, "org", None):
+        return cmd_batch_status(args)
+
     try:
-        data = gh_json(["api", "user"])
-        user = str(data.get("login", ""))
+        user = current_login()
     except RuntimeError:
         print("Error: Not authenticated with GitHub. Run 'gh auth login' first.", file=sys.stderr)
         return 1
@@ -225,34 +2482,43 @@ def cmd_status(args):
     print(f"GitHub user: {user}")
     print(f"Tracking repo: {repo}\n")
 
-    pull_shark = get_merged_prs_count(user)
-    pair_extra = get_coauthored_prs_count(user)
-    total_stars = get_total_stars(user)
-    public_repos = get_public_repos(user)
-    followers = get_followers(user)
-    following = get_following(user)
-    contributions = get_total_contributions(user)
-    year_contributions = get_year_contributions(user)
-    total_prs = get_total_prs(user)
-    total_issues = get_total_issues(user)
-    gists = get_gists_count(user)
+    source = getattr(args, "source", "auto")
+    if getattr(args, "verbose", False):
+        plan = plan_metrics(list(STATUS_METRICS), metric_sources(user, source))
+        print("Plan: " + "; ".join(f"{step.name} -> {', '.join(assigned)}" for step, assigned in plan), file=sys.stderr)
+    metrics = fetch_status_metrics(user, getattr(args, "workers", None), source)
+    if not getattr(args, "no_history", False):
+        record_history(user, metrics)
+    pull_shark = metrics["merged_prs"]
+    pair_extra = metrics["coauthored_prs"]
+    total_stars = metrics["total_stars"]
+    public_repos = metrics["public_repos"]
+    followers = metrics["followers"]
+    following = metrics["following"]
+    year_contributions = metrics["year_contributions"]
+    total_prs = metrics["total_prs"]
+    total_issues = metrics["total_issues"]
+    gists = metrics["gists"]
+    quickdraw = metrics["quickdraw"]
+    yolo = metrics["yolo"]
+    accepted_answers = metrics["accepted_answers"]
 
     print("=== Achievement Badges ===")
     print("PR-Based:")
     print(f"  Pull Shark (merged PRs): {pull_shark}")
     print(f"  Pair Extraordinaire (co-authored PRs): {pair_extra}")
-    print(f"  Quickdraw: (manual - close issue within 5 min)")
-    print(f"  YOLO: (manual - merge without review)")
+    print(f"  Quickdraw (closed within 5 min): {quickdraw}")
+    print(f"  YOLO (merged without review): {yolo}")
     print("\nCommunity:")
-    print(f"  Galaxy Brain (accepted answers): (manual)")
-    print(f"  Public Sponsor: (manual)")
+    print(f"  Galaxy Brain (accepted answers): {accepted_answers}")
+    print("  Public Sponsor: (manual)")
     print("\nProfile:")
     print(f"  Starstruck (total stars): {total_stars}")
     print(f"  Hacker (public repos): {public_repos}")
-    print(f"  Founder (first repo): (manual)")
-    print(f"  Developer (profile pic): (manual)")
+    print("  Founder (first repo): (manual)")
+    print("  Developer (profile pic): (manual)")
     print(f"  Llama (1000 contributions/year): {year_contributions} / 1000")
-    print(f"  Arctic Code Vault (2020 contributors): (manual - one-time)")
+    print("  Arctic Code Vault (2020 contributors): (manual - one-time)")
     print("\n=== Profile Stats ===")
     print(f"  Followers: {followers}")
     print(f"  Following: {following}")
@@ -277,51 +2543,420 @@ def cmd_seed(args):
         ("Pair Extraordinaire: co-author a commit", "Coordinate a co-authored PR with a collaborator."),
         ("Quickdraw: open + close a small issue", "Create a tiny issue and close it quickly with a fix."),
         ("YOLO: merge a PR without review", "Create a PR in your repo and merge without review if policy allows."),
-        
+
         # Community achievements
         ("Galaxy Brain: answer 2 Q&A discussions", "Find 2 unanswered Q&A discussions and respond with helpful answers."),
         ("Public Sponsor: pick a project to sponsor", "Choose a project and confirm sponsorship plan."),
-        
+
         # Repo achievements
         ("Starstruck: build a star-worthy repo", "Outline plan for a repo that solves a real problem."),
         ("Hacker: create first public repo", "Create your first public repository."),
         ("Founder: create first repo", "Create your first repository (public or private)."),
-        
+
         # Profile achievements
         ("Developer: set profile picture", "Upload a profile picture to your GitHub account."),
         ("Llama: reach 1000 contributions", "Make 1000 contributions in a year - aim for consistent daily contributions."),
     ]
 
-    existing = set(list_open_issue_titles(repo))
-    created = 0
+    try:
+        existing = existing_title_keys(repo, [title for title, _ in issues])
+    except RuntimeError as e:
+        print(f"Error listing issues in {repo}: {e}", file=sys.stderr)
+        return 1
+    missing = []
     for title, body in issues:
-        if title in existing:
-            continue
-        proc = run(["gh", "issue", "create", "--repo", repo, "--title", title, "--body", body], check=False)
-        if proc.returncode == 0:
+        key = title_key(title)
+        if key not in existing:
+            existing.add(key)
+            missing.append((title, body))
+    if not missing:
+        print("All achievement issues already exist.")
+        return 0
+
+    labeled = ensure_seed_label(repo)
+
+    def create(title: str, body: str) -> str:
+        cmd = ["gh", "issue", "create", "--repo", repo, "--title", title, "--body", body]
+        if labeled:
+            cmd += ["--label", SEED_LABEL]
+        proc = run(cmd, check=False)
+        return "" if proc.returncode == 0 else (proc.stderr.strip() or proc.stdout.strip())
+
+    workers = getattr(args, "workers", None) or int(get_config_value("max_workers", MAX_WORKERS))
+    errors = fetch_concurrently({title: (lambda t=title, b=body: create(t, b)) for title, body in missing}, workers)
+    for title, error in errors.items():
+        if error:
+            print(f"Error creating '{title}': {error}")
+        else:
             print(f"Created: {title}")
-            created += 1
+    return 0
+
+
+def cmd_history(args):
+    store = SnapshotStore()
+    try:
+        user = args.user or store.last_user()
+        if not user:
+            print("No history recorded yet. Run 'status' first.", file=sys.stderr)
+            return 1
+        since = int(time.time()) - args.days * 86400
+        metrics = [args.metric] if args.metric else store.metrics(user)
+        print(f"History for {user} (last {args.days} days)\n")
+        for metric in metrics:
+            series = store.series(user, metric, since)
+            if not series:
+                print(f"{metric}: no data")
+                continue
+            first, last = series[0][1], series[-1][1]
+            print(f"{metric}: {last} ({last - first:+d} over {len(series)} snapshots)")
+            if args.weekly:
+                for week, change in weekly_changes(series):
+                    print(f"  {week}: {change:+d}")
+            for achievement, source in ACHIEVEMENT_METRICS.items():
+                if source != metric:
+                    continue
+                target = next_threshold(achievement, last)
+                if target is None:
+                    print(f"  {achievement}: all tiers reached")
+                    continue
+                days = days_until(series, target)
+                eta = f"~{days:.0f} days at the current rate" if days is not None else "no recent progress"
+                print(f"  {achievement}: {target - last} to go for {target} ({eta})")
+        return 0
+    finally:
+        store.close()
+
+
+class Watcher:
+    """Keeps metrics in memory and re-polls each on its own adaptive interval.
+
+    A metric whose value did not change has its interval multiplied by `backoff` (up
+    to `max_interval`); a change resets it to `min_interval`. `emit` receives one dict
+    per event: an initial "snapshot", then "change" and "tier" events.
+    """
+
+    def __init__(self, user: str, metrics: List[str], source: str = "rest", min_interval: float = 60.0,
+                 max_interval: float = 3600.0, backoff: float = 2.0, emit: Optional[Callable[[Dict], None]] = None,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep,
+                 history: bool = True) -> None:
+        self.user = user
+        self.metrics = metrics
+        self.source = source
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.emit = emit or (lambda event: print(json.dumps(event, sort_keys=True), flush=True))
+        self.clock = clock
+        self.sleep = sleep
+        self.history = history
+        self.values: Dict[str, object] = {}
+        self.intervals = {metric: min_interval for metric in metrics}
+        self.next_due = {metric: clock() for metric in metrics}
+        self.polls = 0
+
+    def poll_once(self) -> List[str]:
+        """Fetch the metrics that are due; returns the ones whose value changed."""
+        now = self.clock()
+        due = [m for m in self.metrics if self.next_due[m] <= now]
+        if not due:
+            return []
+        # A fresh memo per poll; the on-disk cache turns unchanged documents into 304s.
+        with request_scope():
+            values = collect_metrics(self.user, due, self.source)
+        cache = _response_cache
+        if cache is not None:
+            try:
+                cache.save()
+            except OSError:
+                pass
+        self.polls += 1
+        first = not self.values
+        changed = []
+        for metric in due:
+            if metric not in values:
+                self.intervals[metric] = min(self.max_interval, self.intervals[metric] * self.backoff)
+            elif metric in self.values and values[metric] == self.values[metric]:
+                self.intervals[metric] = min(self.max_interval, self.intervals[metric] * self.backoff)
+            else:
+                old = self.values.get(metric)
+                self.values[metric] = values[metric]
+                self.intervals[metric] = self.min_interval
+                if old is not None:
+                    changed.append(metric)
+                    self.emit({"event": "change", "user": self.user, "metric": metric, "old": old,
+                               "new": values[metric], "ts": int(now)})
+                    self._check_tiers(metric, old, values[metric], now)
+            self.next_due[metric] = now + self.intervals[metric]
+        if first:
+            self.emit({"event": "snapshot", "user": self.user, "values": dict(self.values), "ts": int(now)})
+        if (first or changed) and self.history:
+            record_history(self.user, {m: self.values[m] for m in (self.values if first else changed)})
+        return changed
+
+    def _check_tiers(self, metric: str, old: object, new: object, now: float) -> None:
+        if not isinstance(old, int) or not isinstance(new, int):
+            return
+        for achievement, source in ACHIEVEMENT_METRICS.items():
+            if source != metric:
+                continue
+            old_tier, new_tier = achievement_tier(achievement, old), achievement_tier(achievement, new)
+            if new_tier != old_tier:
+                thresholds = achievement_thresholds(achievement)
+                self.emit({"event": "tier", "user": self.user, "achievement": achievement, "old_tier": old_tier,
+                           "tier": new_tier, "threshold": thresholds[max(new_tier, old_tier) - 1], "value": new,
+                           "ts": int(now)})
+
+    def run(self, iterations: int = 0) -> None:
+        """Poll until interrupted, or for `iterations` polls when it is positive."""
+        while iterations <= 0 or self.polls < iterations:
+            self.poll_once()
+            if 0 < iterations <= self.polls:
+                return
+            self.sleep(max(0.0, min(self.next_due.values()) - self.clock()))
+
+
+WATCH_METRICS = [m for m in STATUS_METRICS if m != "contributions"]
+
+
+def cmd_watch(args):
+    if args.user:
+        user = args.user
+    else:
+        try:
+            user = current_login()
+        except RuntimeError:
+            print("Error: Not authenticated with GitHub. Run 'gh auth login' first.", file=sys.stderr)
+            return 1
+    metrics = args.metric or WATCH_METRICS
+    watcher = Watcher(user, metrics, args.source, args.min_interval, args.max_interval,
+                      history=not args.no_history)
+    try:
+        watcher.run(args.iterations)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def verify_signature(secret: bytes, body: bytes, signature: str) -> bool:
+    """Check a delivery's X-Hub-Signature-256 header against the shared secret."""
+    expected = "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+def webhook_deltas(event: str, payload: Dict) -> List[Tuple[str, str, int]]:
+    """(login, metric, delta) counter updates implied by one webhook delivery."""
+    action = payload.get("action")
+
+    def login(obj: Optional[Dict]) -> str:
+        return str(((obj or {}).get("user") or {}).get("login") or "")
+
+    deltas = []
+    if event == "pull_request":
+        pr = payload.get("pull_request") or {}
+        if action == "opened":
+            deltas.append((login(pr), "total_prs", 1))
+        elif action == "closed" and pr.get("merged"):
+            deltas.append((login(pr), "merged_prs", 1))
+    elif event == "star":
+        owner = str(((payload.get("repository") or {}).get("owner") or {}).get("login") or "")
+        if action in ("created", "deleted"):
+            deltas.append((owner, "total_stars", 1 if action == "created" else -1))
+    elif event == "issues":
+        if action == "opened":
+            deltas.append((login(payload.get("issue")), "total_issues", 1))
+    elif event == "discussion":
+        if action == "answered":
+            deltas.append((login(payload.get("answer")), "accepted_answers", 1))
+        elif action == "unanswered":
+            deltas.append((login(payload.get("old_answer")), "accepted_answers", -1))
+    return [d for d in deltas if d[0]]
+
+
+def counters_file() -> Path:
+    return CONFIG_FILE.parent / "counters.json"
+
+
+class CounterStore:
+    """Per-user metric counters kept current by webhooks and periodic reconciliation."""
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path or counters_file()
+        self.lock = threading.Lock()
+        self.data: Dict = {"users": {}, "reconciled_at": {}}
+        if self.path.exists():
+            with open(self.path) as f:
+                self.data.update(json.load(f))
+
+    def get(self, user: str) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.data["users"].get(user, {}))
+
+    def users(self) -> List[str]:
+        with self.lock:
+            return list(self.data["users"])
+
+    def apply(self, event: str, payload: Dict) -> List[Tuple[str, str, int]]:
+        deltas = webhook_deltas(event, payload)
+        if deltas:
+            with self.lock:
+                for user, metric, delta in deltas:
+                    counters = self.data["users"].setdefault(user, {})
+                    counters[metric] = max(0, counters.get(metric, 0) + delta)
+                self._save()
+        return deltas
+
+    def reconcile(self, user: str, values: Dict[str, object]) -> None:
+        """Replace counters with freshly fetched values (webhooks can be missed)."""
+        with self.lock:
+            counters = self.data["users"].setdefault(user, {})
+            counters.update({k: v for k, v in values.items() if isinstance(v, int)})
+            self.data["reconciled_at"][user] = int(time.time())
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+WEBHOOK_METRICS = ["merged_prs", "total_prs", "total_stars", "total_issues", "accepted_answers"]
+
+
+def make_webhook_handler(store: CounterStore, secret: bytes):
+    from http.server import BaseHTTPRequestHandler
+
+    seen: "OrderedDict[str, None]" = OrderedDict()
+    seen_lock = threading.Lock()
+
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if not verify_signature(secret, body, self.headers.get("X-Hub-Signature-256", "")):
+                self.send_error(401, "Bad signature")
+                return
+            delivery = self.headers.get("X-GitHub-Delivery", "")
+            with seen_lock:
+                duplicate = bool(delivery) and delivery in seen
+                if delivery and not duplicate:
+                    seen[delivery] = None
+                    while len(seen) > 1000:
+                        seen.popitem(last=False)
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                self.send_error(400, "Invalid JSON")
+                return
+            if not duplicate:
+                for user, metric, delta in store.apply(self.headers.get("X-GitHub-Event", ""), payload):
+                    print(json.dumps({"event": "counter", "user": user, "metric": metric, "delta": delta,
+                                      "value": store.get(user).get(metric)}, sort_keys=True), flush=True)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return WebhookHandler
+
+
+def reconcile_counters(store: CounterStore, users: List[str], source: str = "auto") -> None:
+    for user in users:
+        with request_scope():
+            store.reconcile(user, collect_metrics(user, WEBHOOK_METRICS, source))
+
+
+def replay_webhooks(store: CounterStore, paths: List[str], event: Optional[str] = None) -> int:
+    """Apply recorded deliveries: `{"event": ..., "payload": ...}` files, or raw payloads with `event`."""
+    applied = 0
+    for path in paths:
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict) and "payload" in data and "event" in data:
+            kind, payload = data["event"], data["payload"]
+        elif event:
+            kind, payload = event, data
         else:
-            print(f"Error creating '{title}': {proc.stderr.strip() or proc.stdout.strip()}")
+            raise ValueError(f"{path}: no event type; wrap it as {{\"event\", \"payload\"}} or pass --event")
+        applied += len(store.apply(kind, payload))
+    return applied
 
-    if created == 0:
-        print("All achievement issues already exist.")
+
+def cmd_serve_webhooks(args):
+    store = CounterStore()
+    if args.replay:
+        try:
+            applied = replay_webhooks(store, args.replay, args.event)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(f"Applied {applied} counter updates from {len(args.replay)} deliveries")
+        for user in store.users():
+            print(json.dumps({"user": user, **store.get(user)}, sort_keys=True))
+        return 0
+
+    secret = args.secret or os.environ.get("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        print("Error: a webhook secret is required (--secret or GITHUB_WEBHOOK_SECRET).", file=sys.stderr)
+        return 1
+    users = sorted(set(args.user or []) | set(store.users()))
+    from http.server import ThreadingHTTPServer
+
+    stop = threading.Event()
+
+    def reconcile_loop():
+        while not stop.is_set():
+            try:
+                reconcile_counters(store, sorted(set(users) | set(store.users())))
+            except Exception as e:
+                print(f"Reconciliation failed: {e}", file=sys.stderr)
+            stop.wait(args.reconcile_interval)
+
+    if args.reconcile_interval > 0:
+        threading.Thread(target=reconcile_loop, daemon=True).start()
+    server = ThreadingHTTPServer((args.host, args.port), make_webhook_handler(store, secret.encode()))
+    print(f"Listening for webhooks on http://{args.host}:{server.server_address[1]}/", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+    return 0
+
+
+def cmd_cache(args):
+    cache = open_response_cache()
+    if args.action == "clear":
+        count = len(cache)
+        cache.clear()
+        cache.save()
+        probe_file().unlink(missing_ok=True)
+        search_shards_file().unlink(missing_ok=True)
+        print(f"Cleared {count} cached responses from {cache.path}")
+        return 0
+
+    print(f"Cache file: {cache.path}")
+    print(f"Entries: {len(cache)}")
+    print(f"Size: {cache.size} / {cache.max_bytes} bytes")
     return 0
 
 
 def cmd_config(args):
     config = load_config()
-    
+
     if args.set_repo:
         config["repo"] = args.set_repo
         save_config(config)
         print(f"Repo set to: {args.set_repo}")
         return 0
-    
+
     if args.show:
         print(json.dumps(config, indent=2))
         return 0
-    
+
     print(f"Config file: {CONFIG_FILE}")
     print(f"Current repo: {config.get('repo', 'not set')}")
     print("\nUse --set-repo <owner/repo> to change the tracked repository")
@@ -336,26 +2971,116 @@ def main():
         epilog="""
 Examples:
   %(prog)s status         Show achievement progress
+  %(prog)s status --org myorg --checkpoint scan.jsonl
   %(prog)s seed           Create action items as issues
   %(prog)s auto           Run status then seed
   %(prog)s config         Show configuration
   %(prog)s config --set-repo myname/myrepo
+  %(prog)s history --weekly --metric merged_prs
+  %(prog)s cache stats    Show API response cache usage
+  %(prog)s --profile --trace-file trace.json status
+  %(prog)s --record cassettes/ status   then   %(prog)s --replay cassettes/ status
   %(prog)s --version      Show version
 """
     )
     parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print API call statistics to stderr")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the on-disk response cache")
+    parser.add_argument("--transport", choices=["auto", "http", "gh"],
+                        help="API backend: pooled HTTPS client or gh subprocesses (default: auto)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print per-endpoint timing and rate-limit cost to stderr")
+    parser.add_argument("--trace-file", help="Write a Chrome trace-event JSON of every API call and metric fetch")
+    cassette_group = parser.add_mutually_exclusive_group()
+    # dest differs from `serve-webhooks --replay FILE...`, which replays webhook payloads.
+    cassette_group.add_argument("--record", metavar="DIR", dest="record_cassette",
+                                help="Save every API response to a cassette in DIR")
+    cassette_group.add_argument("--replay", metavar="DIR", dest="replay_cassette",
+                                help="Answer every API call from the cassette in DIR (no network, no gh)")
     subparsers = parser.add_subparsers(dest="command", required=True)
-    
-    subparsers.add_parser("status", help="Show achievement progress")
-    subparsers.add_parser("seed", help="Create action items as issues")
+
+    status_parser = subparsers.add_parser("status", help="Show achievement progress")
+    status_parser.add_argument("--workers", type=int, help=f"Max concurrent API calls (default: {MAX_WORKERS})")
+    status_parser.add_argument("--source", choices=["auto", "graphql", "rest"], default="auto",
+                               help="Fetch metrics with one GraphQL query, REST calls, or GraphQL with REST fallback")
+    batch_group = status_parser.add_mutually_exclusive_group()
+    batch_group.add_argument("--users-file", help="Report on every login in this file (one per line) as JSON lines")
+    batch_group.add_argument("--org", help="Report on every member of this organization as JSON lines")
+    status_parser.add_argument("--checkpoint", help="Append batch results here and skip users it already contains")
+    status_parser.add_argument("--no-history", action="store_true", help="Do not record this run in the history database")
+    seed_parser = subparsers.add_parser("seed", help="Create action items as issues")
+    seed_parser.add_argument("--workers", type=int, help=f"Max concurrent issue creations (default: {MAX_WORKERS})")
     subparsers.add_parser("auto", help="Run status then seed")
-    
+
     config_parser = subparsers.add_parser("config", help="Manage configuration")
     config_parser.add_argument("--show", action="store_true", help="Show full config")
     config_parser.add_argument("--set-repo", type=str, help="Set the tracked repository (owner/repo)")
-    
+
+    watch_parser = subparsers.add_parser("watch", help="Keep polling metrics and print changes as JSON lines")
+    watch_parser.add_argument("--user", help="GitHub login to watch (default: the authenticated user)")
+    watch_parser.add_argument("--metric", action="append", choices=WATCH_METRICS, help="Metric to watch (repeatable; default: all)")
+    watch_parser.add_argument("--source", choices=["auto", "graphql", "rest"], default="rest",
+                              help="Metric source (default: rest, so unchanged data is revalidated with ETags)")
+    watch_parser.add_argument("--min-interval", type=float, default=60.0, help="Seconds between polls of a changing metric")
+    watch_parser.add_argument("--max-interval", type=float, default=3600.0, help="Longest back-off for an unchanged metric")
+    watch_parser.add_argument("--iterations", type=int, default=0, help="Stop after this many polls (default: run forever)")
+    watch_parser.add_argument("--no-history", action="store_true", help="Do not record changes in the history database")
+
+    webhook_parser = subparsers.add_parser("serve-webhooks", help="Update counters from GitHub webhook deliveries")
+    webhook_parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    webhook_parser.add_argument("--port", type=int, default=8787, help="Port to listen on (default: 8787)")
+    webhook_parser.add_argument("--secret", help="Webhook secret (default: $GITHUB_WEBHOOK_SECRET)")
+    webhook_parser.add_argument("--user", action="append", help="Login to reconcile against the API (repeatable)")
+    webhook_parser.add_argument("--reconcile-interval", type=float, default=6 * 3600,
+                                help="Seconds between full API reconciliations; 0 disables (default: 21600)")
+    webhook_parser.add_argument("--replay", nargs="+", metavar="FILE", help="Apply recorded payload files and exit")
+    webhook_parser.add_argument("--event", help="Event type for raw payload files given to --replay")
+
+    history_parser = subparsers.add_parser("history", help="Show recorded metrics over time")
+    history_parser.add_argument("--user", help="GitHub login (default: the most recently recorded user)")
+    history_parser.add_argument("--metric", help="Only show this metric (e.g. merged_prs)")
+    history_parser.add_argument("--days", type=int, default=365, help="How far back to look (default: 365)")
+    history_parser.add_argument("--weekly", action="store_true", help="Show the change per week")
+
+    cache_parser = subparsers.add_parser("cache", help="Inspect or clear the API response cache")
+    cache_parser.add_argument("action", choices=["stats", "clear"], help="Show cache statistics or delete all entries")
+
     args = parser.parse_args()
-    
+
+    try:
+        with cassette_scope(record=args.record_cassette, replay=args.replay_cassette):
+            return run_command(parser, args)
+    except CassetteError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+def run_command(parser: argparse.ArgumentParser, args) -> int:
+    uses_api = args.command in ("status", "seed", "auto", "watch", "serve-webhooks")
+    transport = _transport
+    if uses_api and not args.replay_cassette:
+        transport = make_transport(args.transport or str(get_config_value("transport", "auto")))
+    with use_transport(transport), rate_limit_scope() as scheduler, request_scope() as memo, \
+            persistent_cache(uses_api and not args.no_cache) as cache, \
+            trace_scope(args.profile or bool(args.trace_file)) as tracer:
+        result = dispatch(parser, args)
+    if tracer is not None:
+        if args.profile:
+            print(tracer.summary(), file=sys.stderr)
+        if args.trace_file:
+            with open(args.trace_file, "w") as f:
+                json.dump(tracer.chrome_trace(), f)
+            print(f"Wrote {len(tracer.spans)} spans to {args.trace_file}", file=sys.stderr)
+    if args.verbose:
+        print(f"API calls: {memo.misses} (memoized hits: {memo.hits})", file=sys.stderr)
+        if cache is not None:
+            print(f"Disk cache: {cache.revalidated} revalidated (304), {cache.stored} stored", file=sys.stderr)
+    if scheduler.budget or scheduler.retries:
+        print(scheduler.summary(), file=sys.stderr)
+    return result
+
+
+def dispatch(parser: argparse.ArgumentParser, args) -> int:
     if args.command == "status":
         return cmd_status(args)
     elif args.command == "seed":
@@ -365,6 +3090,14 @@ Examples:
         return cmd_seed(args)
     elif args.command == "config":
         return cmd_config(args)
+    elif args.command == "cache":
+        return cmd_cache(args)
+    elif args.command == "history":
+        return cmd_history(args)
+    elif args.command == "watch":
+        return cmd_watch(args)
+    elif args.command == "serve-webhooks":
+        return cmd_serve_webhooks(args)
     else:
         parser.print_help()
         return 1
@@ -4,64 +4,79 @@
 Generates an HTML page with GitHub achievement stats.
 Run this locally or in CI to update GitHub Pages.
 """
+import argparse
+import gzip
+import hashlib
 import json
-import subprocess
+import os
 import sys
-from pathlib import Path
 from datetime import datetime
+from pathlib import Path
 
-REPO = "UberMetroid/GitHub-Achievements"
-
-
-def run(cmd):
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    return result
-
+from earn_achievements import (
+    ACHIEVEMENT_METRICS,
+    CassetteError,
+    SnapshotStore,
+    achievement_tier,
+    cassette_scope,
+    collect_or_stale,
+    current_login,
+    current_time,
+    format_age,
+    load_users_file,
+    make_transport,
+    persistent_cache,
+    rate_limit_scope,
+    record_history,
+    request_scope,
+    use_transport,
+)
 
-def gh_json(args):
-    proc = run(["gh"] + args)
-    if proc.returncode != 0:
-        raise RuntimeError(proc.stderr)
-    return json.loads(proc.stdout)
+REPO = "UberMetroid/GitHub-Achievements"
+PAGE_METRICS = ["merged_prs", "coauthored_prs", "total_stars", "public_repos", "followers", "following"]
+OUTPUT_DIR = Path("docs")
+# Kept next to the output directory, not in it, so it never ends up in the published site.
+MANIFEST_PATH = Path(".cache") / "stats-page-manifest.json"
+LEADERBOARD_PAGE_SIZE = 100
+LEADERBOARD_COLUMNS = ["user", "tiers"] + PAGE_METRICS
+METRIC_LABELS = {"merged_prs": "Merged PRs", "coauthored_prs": "Co-authored PRs", "total_stars": "Total Stars",
+                 "public_repos": "Public Repos", "followers": "Followers", "following": "Following"}
 
 
-def get_stats():
-    user_data = gh_json(["api", "user"])
-    user = user_data.get("login")
+def get_stats(user=None):
+    if not user:
+        user = current_login()
 
     stats = {
         "user": user,
-        "updated": datetime.now().isoformat(),
+        "updated": current_time().isoformat(),
     }
 
-    try:
-        merged = gh_json(["api", "/search/issues", "-f", "q=is:pr is:merged author:{}".format(user)])
-        stats["merged_prs"] = merged.get("total_count", 0)
-    except:
-        stats["merged_prs"] = "N/A"
+    values, stale = collect_or_stale(user, PAGE_METRICS)
+    stats.update({metric: values.get(metric, "N/A") for metric in PAGE_METRICS})
+    if stale:
+        # Coarse ages, so an outage rewrites the page at most hourly.
+        stats["stale"] = {metric: format_age(age) for metric, age in stale.items()}
+    return stats
 
-    try:
-        coauthored = gh_json(["api", "/search/issues", "-f", "q=is:pr is:merged author:{} co-authored-by:{}".format(user, user)])
-        stats["coauthored_prs"] = coauthored.get("total_count", 0)
-    except:
-        stats["coauthored_prs"] = "N/A"
 
-    try:
-        repos = gh_json(["api", "/users/{}/repos".format(user), "--paginate"])
-        stats["total_stars"] = sum(r.get("stargazers_count", 0) for r in repos)
-        stats["public_repos"] = len([r for r in repos if r.get("visibility") == "public"])
-    except:
-        stats["total_stars"] = "N/A"
-        stats["public_repos"] = "N/A"
+def fresh_stats(stats):
+    """`stats` without values served from the last-known-good store, for recording history."""
+    return {key: value for key, value in stats.items() if key not in stats.get("stale", {})}
 
-    try:
-        user_details = gh_json(["api", "/users/{}".format(user)])
-        stats["followers"] = user_details.get("followers", 0)
-        stats["following"] = user_details.get("following", 0)
-    except:
-        stats["followers"] = "N/A"
-        stats["following"] = "N/A"
 
+def get_stats_from_history(user=None):
+    """Latest recorded snapshot, so the page can be rebuilt without calling the API."""
+    store = SnapshotStore()
+    try:
+        user = user or store.last_user()
+        ts, latest = store.latest(user) if user else (None, {})
+    finally:
+        store.close()
+    if ts is None:
+        raise RuntimeError("no recorded history for {}".format(user or "any user"))
+    stats = {"user": user, "updated": datetime.fromtimestamp(ts).isoformat()}
+    stats.update({metric: latest.get(metric, "N/A") for metric in PAGE_METRICS})
     return stats
 
 
@@ -156,7 +171,7 @@ def generate_html(stats):
 <body>
     <div class="container">
         <h1>🏆 GitHub Achievements</h1>
-        <p class="updated">Last updated: {updated}</p>
+        <p class="updated">Last updated: {updated}{stale_note}</p>
 
         <div class="stats-grid">
             <div class="stat-card">
@@ -191,7 +206,7 @@ def generate_html(stats):
                 Track your progress at <a href="https://github.com/{user}">github.com/{user}</a>
             </p>
             <p style="color: #8b949e;">
-                See <a href="https://github.com/UberMetroid/GitHub-Achievements">GitHub-Achievements</a> 
+                See <a href="https://github.com/UberMetroid/GitHub-Achievements">GitHub-Achievements</a>
                 repo for tools to track and earn achievements.
             </p>
         </div>
@@ -201,32 +216,282 @@ def generate_html(stats):
         </footer>
     </div>
 </body>
-</html>""".format(**{**stats, "updated": stats["updated"].replace("T", " ").split(".")[0]})
+</html>""".format(**{**stats, "updated": stats["updated"].replace("T", " ").split(".")[0],
+                      "stale_note": stale_note(stats)})
+
+
+def stale_note(stats):
+    stale = stats.get("stale")
+    if not stale:
+        return ""
+    parts = ", ".join(f"{METRIC_LABELS.get(metric, metric)} ({age} old)" for metric, age in stale.items())
+    return f" &middot; API unavailable, showing last known: {parts}"
 
 
-def main():
+def page_digest(stats):
+    """Hash of the rendered page without its timestamp, so template changes count too."""
+    return hashlib.sha256(generate_html({**stats, "updated": ""}).encode()).hexdigest()
+
+
+def default_manifest(out_dir):
+    return out_dir.parent / MANIFEST_PATH
+
+
+def load_manifest(path):
     try:
-        stats = get_stats()
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def write_page(out_dir, name, stats, manifest, force=False):
+    """Write `name` and a precompressed `name.gz` unless the page is unchanged. Returns True if
+    its content changed.
+
+    The files are also rewritten when they are missing or differ from the last build (e.g. a
+    stale copy from a fresh checkout), without counting as a change.
+    """
+    path = out_dir / name
+    gz_path = path.with_name(path.name + ".gz")
+    digest = page_digest(stats)
+    entry = manifest.get(name)
+    entry = entry if isinstance(entry, dict) else {}
+    changed = force or entry.get("digest") != digest
+    current = path.exists() and gz_path.exists() and hashlib.sha256(path.read_bytes()).hexdigest() == entry.get("sha256")
+    if not changed and current:
+        return False
+    html = generate_html(stats).encode()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(html)
+    gz_path.write_bytes(gzip.compress(html, mtime=0))
+    manifest[name] = {"digest": digest, "sha256": hashlib.sha256(html).hexdigest()}
+    return changed
+
+
+def write_if_changed(path, data):
+    """Write `path` and `path.gz` only when the bytes differ from what is on disk."""
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    path.with_name(path.name + ".gz").write_bytes(gzip.compress(data, mtime=0))
+    return True
+
+
+def leaderboard_row(stats):
+    values = [stats.get(metric) if isinstance(stats.get(metric), int) else None for metric in PAGE_METRICS]
+    tiers = sum(achievement_tier(achievement, stats[metric]) for achievement, metric in ACHIEVEMENT_METRICS.items()
+                if isinstance(stats.get(metric), int))
+    return [stats["user"], tiers] + values
+
+
+def leaderboard_shards(rows, page_size=LEADERBOARD_PAGE_SIZE):
+    """{(sort key, page): rows} with every column ranked descending; unknown values sort last."""
+    shards = {}
+    for col, key in enumerate(LEADERBOARD_COLUMNS[1:], start=1):
+        ranked = sorted(rows, key=lambda row: (row[col] is None, -(row[col] or 0), row[0].lower()))
+        for page, start in enumerate(range(0, len(ranked), page_size)):
+            shards[(key, page)] = ranked[start:start + page_size]
+    return shards
+
+
+def write_leaderboard(out_dir, all_stats, page_size=LEADERBOARD_PAGE_SIZE):
+    """Write leaderboard/index.html, a compact index.json and one JSON shard per sort key and page.
+
+    The page only ever downloads the index and the shard it is showing, so it stays the same size
+    however many users there are. Returns the number of files rewritten.
+    """
+    lb_dir = out_dir / "leaderboard"
+    rows = [leaderboard_row(stats) for stats in all_stats]
+    shards = leaderboard_shards(rows, page_size)
+    keys = LEADERBOARD_COLUMNS[1:]
+    index = {
+        "columns": LEADERBOARD_COLUMNS,
+        "keys": keys,
+        "page_size": page_size,
+        "total": len(rows),
+        "pages": {key: sum(1 for k, _ in shards if k == key) for key in keys},
+    }
+    written = write_if_changed(lb_dir / "index.html", LEADERBOARD_HTML.encode())
+    written += write_if_changed(lb_dir / "index.json", json.dumps(index, separators=(",", ":")).encode())
+    for (key, page), shard in shards.items():
+        data = {"key": key, "offset": page * page_size, "rows": shard}
+        written += write_if_changed(lb_dir / key / f"{page}.json", json.dumps(data, separators=(",", ":")).encode())
+    for key in keys:
+        for stale in (lb_dir / key).glob("*.json*"):
+            if int(stale.name.split(".")[0]) >= index["pages"][key]:
+                stale.unlink()
+    return written
+
+
+LEADERBOARD_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>GitHub Achievements Leaderboard</title>
+    <style>
+        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+               background: #0d1117; color: #c9d1d9; padding: 40px 20px; margin: 0; }
+        .container { max-width: 1000px; margin: 0 auto; }
+        h1 { color: #58a6ff; }
+        table { width: 100%; border-collapse: collapse; background: #161b22; }
+        th, td { border: 1px solid #30363d; padding: 8px; text-align: right; }
+        th:nth-child(-n+2), td:nth-child(-n+2) { text-align: left; }
+        th { cursor: pointer; color: #8b949e; }
+        th.active { color: #58a6ff; }
+        a { color: #58a6ff; text-decoration: none; }
+        nav { margin: 20px 0; color: #8b949e; }
+        button { background: #21262d; color: #c9d1d9; border: 1px solid #30363d; border-radius: 6px; padding: 5px 12px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>🏆 Leaderboard</h1>
+        <table><thead><tr id="head"></tr></thead><tbody id="rows"></tbody></table>
+        <nav><button id="prev">Prev</button> <span id="where"></span> <button id="next">Next</button></nav>
+    </div>
+    <script>
+        let index, key, page = 0;
+        const get = (path) => fetch(path).then((r) => r.json());
+        const cell = (tag, text) => { const el = document.createElement(tag); el.textContent = text; return el; };
+        async function show() {
+            const shard = await get(`${key}/${page}.json`);
+            const head = document.getElementById("head");
+            head.replaceChildren(cell("th", "#"), ...index.columns.map((c) => {
+                const th = cell("th", c.replace("_", " "));
+                if (c === key) th.className = "active";
+                if (index.keys.includes(c)) th.onclick = () => { key = c; page = 0; show(); };
+                return th;
+            }));
+            document.getElementById("rows").replaceChildren(...shard.rows.map((row, i) => {
+                const tr = document.createElement("tr");
+                tr.append(cell("td", shard.offset + i + 1));
+                const link = cell("a", row[0]);
+                link.href = `../users/${encodeURIComponent(row[0])}.html`;
+                const td = document.createElement("td");
+                td.append(link);
+                tr.append(td, ...row.slice(1).map((v) => cell("td", v === null ? "N/A" : v)));
+                return tr;
+            }));
+            const pages = index.pages[key];
+            document.getElementById("where").textContent = `page ${page + 1} of ${pages} (${index.total} users)`;
+            document.getElementById("prev").disabled = page === 0;
+            document.getElementById("next").disabled = page + 1 >= pages;
+        }
+        document.getElementById("prev").onclick = () => { page--; show(); };
+        document.getElementById("next").onclick = () => { page++; show(); };
+        get("index.json").then((data) => { index = data; key = data.keys[0]; show(); });
+    </script>
+</body>
+</html>
+"""
+
+
+def demo_stats():
+    return {
+        "user": "YourUsername",
+        "updated": datetime.now().isoformat(),
+        "merged_prs": 0,
+        "coauthored_prs": 0,
+        "total_stars": 0,
+        "public_repos": 0,
+        "followers": 0,
+        "following": 0,
+    }
+
+
+def collect_pages(args):
+    """(page name, stats) for every page to build; one per user when --users-file is given."""
+    if args.users_file:
+        users = load_users_file(args.users_file)
+        fetch = get_stats_from_history if args.from_history else get_stats
+        pages = []
+        for user in users:
+            try:
+                pages.append((f"users/{user}.html", fetch(user)))
+            except Exception as e:
+                print(f"Skipping {user}: {e}")
+        return pages
+    if args.from_history:
+        return [("index.html", get_stats_from_history(args.user))]
+    return [("index.html", get_stats())]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the GitHub achievements stats page")
+    parser.add_argument("--from-history", action="store_true",
+                        help="Render the latest recorded snapshot instead of calling the API")
+    parser.add_argument("--user", help="User to render from history (default: the most recently recorded)")
+    parser.add_argument("--users-file", help="Render docs/users/<login>.html for each login in this file")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR, help="Where to write pages (default: docs)")
+    parser.add_argument("--force", action="store_true", help="Rewrite pages even if they are unchanged")
+    parser.add_argument("--manifest", type=Path,
+                        help=f"Build manifest (default: {MANIFEST_PATH} next to the output directory)")
+    parser.add_argument("--leaderboard", action="store_true",
+                        help="Also write docs/leaderboard/ ranking every user in --users-file")
+    parser.add_argument("--page-size", type=int, default=LEADERBOARD_PAGE_SIZE,
+                        help=f"Users per leaderboard shard (default: {LEADERBOARD_PAGE_SIZE})")
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument("--record", metavar="DIR", help="Save every API response to a cassette in DIR")
+    cassette_group.add_argument("--replay", metavar="DIR", help="Build from the cassette in DIR without any API calls")
+    args = parser.parse_args(argv)
+    if args.leaderboard and not args.users_file:
+        parser.error("--leaderboard needs --users-file")
+
+    try:
+        if args.from_history:
+            pages = collect_pages(args)
+        else:
+            with cassette_scope(record=args.record, replay=args.replay), use_transport(make_transport()), \
+                    rate_limit_scope() as scheduler, request_scope(), persistent_cache():
+                pages = collect_pages(args)
+                if not args.replay:
+                    print(scheduler.summary())
+                for _, stats in pages:
+                    record_history(stats["user"], fresh_stats(stats))
+    except CassetteError as e:
+        print(f"Error: {e}")
+        return 1
     except Exception as e:
         print(f"Error fetching stats: {e}")
-        print("Generating demo page...")
-        stats = {
-            "user": "YourUsername",
-            "updated": datetime.now().isoformat(),
-            "merged_prs": 0,
-            "coauthored_prs": 0,
-            "total_stars": 0,
-            "public_repos": 0,
-            "followers": 0,
-            "following": 0,
-        }
+        args.leaderboard = False
+        if (args.output_dir / "index.html").exists():
+            print("Keeping the previously generated page")
+            pages = []
+        else:
+            print("Generating demo page...")
+            pages = [("index.html", demo_stats())]
 
-    html = generate_html(stats)
-    output = Path("docs/index.html")
-    output.write_text(html)
-    print(f"Generated {output}")
-    print(f"Stats: {stats}")
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = args.manifest or default_manifest(args.output_dir)
+    manifest = load_manifest(manifest_path)
+    written = 0
+    for name, stats in pages:
+        if write_page(args.output_dir, name, stats, manifest, args.force):
+            written += 1
+            print(f"Generated {args.output_dir / name}")
+        else:
+            print(f"Unchanged {args.output_dir / name}")
+        print(f"Stats: {stats}")
+    save_manifest(manifest_path, manifest)
+    print(f"{written} of {len(pages)} page(s) rebuilt")
+    changed = written
+    if args.leaderboard:
+        changed += write_leaderboard(args.output_dir, [stats for _, stats in pages], args.page_size)
+        print(f"Leaderboard: {len(pages)} users, {changed - written} file(s) rewritten")
+    if os.environ.get("GITHUB_OUTPUT"):
+        # Lets the Pages workflow skip deploying an unchanged site.
+        with open(os.environ["GITHUB_OUTPUT"], "a") as f:
+            f.write(f"changed={'true' if changed else 'false'}\n")
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
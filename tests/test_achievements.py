@@ -1,9 +1,16 @@
+import hashlib
+import hmac
+import http.client
 import json
 import os
 import sys
 import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 import pytest
 
@@ -12,6 +19,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
 import earn_achievements as ea
 
 
+@pytest.fixture(autouse=True)
+def isolated_probe(monkeypatch, tmp_path):
+    monkeypatch.setattr(ea, "probe_file", lambda: tmp_path / "probe.json")
+
+
 @pytest.fixture
 def temp_config_dir(monkeypatch):
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -57,6 +69,35 @@ def test_check_gh_not_installed():
         assert ea.check_gh_installed() is False
 
 
+def test_check_gh_installed_uses_cached_probe():
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value.returncode = 0
+        assert ea.check_gh_installed() is True
+        assert ea.check_gh_installed() is True
+    assert mock_run.call_count == 1
+    with patch.dict(os.environ, {"GH_TOKEN": "another-token"}), patch("subprocess.run") as mock_run:
+        mock_run.return_value.returncode = 0
+        ea.check_gh_installed()
+    assert mock_run.call_count == 1
+
+
+@patch("earn_achievements.gh_json", return_value={"login": "testuser"})
+def test_current_login_cached(mock_gh_json):
+    assert ea.current_login() == "testuser"
+    assert ea.current_login() == "testuser"
+    assert mock_gh_json.call_count == 1
+
+
+def test_load_config_reread_on_mtime_change(temp_config_dir):
+    ea.save_config({"repo": "a/b"})
+    assert ea.load_config()["repo"] == "a/b"
+    ea.load_config()["repo"] = "mutated"
+    assert ea.get_config_value("repo") == "a/b"
+    ea.CONFIG_FILE.write_text('{"repo": "c/d"}')
+    os.utime(ea.CONFIG_FILE, ns=(0, 0))
+    assert ea.load_config()["repo"] == "c/d"
+
+
 @patch("earn_achievements.run")
 def test_gh_json_success(mock_run):
     mock_run.return_value.returncode = 0
@@ -87,11 +128,57 @@ def test_get_merged_prs_count_error(mock_gh_json):
     assert result == "(unavailable)"
 
 
-@patch("earn_achievements.gh_json")
-def test_get_coauthored_prs_count(mock_gh_json):
-    mock_gh_json.return_value = {"total_count": 10}
-    result = ea.get_coauthored_prs_count("testuser")
-    assert result == "10"
+EMPTY_PR_SEARCH = {"data": {"search": {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}}}
+
+
+EMPTY_CONNECTION = {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}
+EMPTY_BADGE_PAGE = {"data": {"user": {"issues": EMPTY_CONNECTION, "pullRequests": EMPTY_CONNECTION}}}
+
+
+def merged_pr(pr_id, merged_at, *oids):
+    return {"id": pr_id, "mergedAt": merged_at,
+            "commits": {"nodes": [{"commit": {"id": f"C_{oid}", "oid": oid}} for oid in oids]}}
+
+
+def test_coauthor_trailers_skip_self():
+    message = "Fix\n\nCo-authored-by: Ana <ana@example.com>\nco-authored-by: me <1+testuser@users.noreply.github.com>\n"
+    trailers = ea.coauthor_trailers(message)
+    assert trailers == ["Ana <ana@example.com>", "me <1+testuser@users.noreply.github.com>"]
+    assert [ea.is_self_trailer(t, "TestUser") for t in trailers] == [False, True]
+    assert ea.is_self_trailer("testuser <t@example.com>", "testuser")
+
+
+def test_get_coauthored_prs_count_scans_trailers(temp_config_dir, monkeypatch):
+    monkeypatch.setattr(ea, "_frozen_time", datetime(2026, 10, 17, tzinfo=timezone.utc).timestamp())
+    prs = {"2025": [merged_pr("PR_1", "2025-03-01T10:00:00Z", "a1", "a2"), merged_pr("PR_2", "2025-05-01T10:00:00Z", "b1")],
+           "2026": [merged_pr("PR_3", "2026-10-16T10:00:00Z", "c1")]}
+    messages = {"a1": "wip", "a2": "done\n\nCo-authored-by: Ana <ana@example.com>", "b1": "solo",
+                "c1": "x\n\nCo-authored-by: testuser <testuser@example.com>", "d1": "y\n\nCo-authored-by: Bo <b@x.io>"}
+    node_queries = []
+
+    def fake(args):
+        query = args[3]
+        if "node(id:" in query:
+            node_queries.append(query)
+            oids = [part.split('"')[0] for part in query.split('"C_')[1:]]
+            return {"data": {f"c{i}": {"oid": oid, "message": messages[oid]} for i, oid in enumerate(oids)}}
+        since, until = args[-1].split("merged:")[1].split("..")
+        found = [pr for year in range(int(since[:4]), int(until[:4]) + 1) for pr in prs.get(str(year), [])]
+        count = 1500 if since[:4] != until[:4] else len(found)
+        return {"data": {"search": {"issueCount": count, "nodes": found[:50],
+                                    "pageInfo": {"hasNextPage": False, "endCursor": None}}}}
+
+    with patch("earn_achievements.gh_json", side_effect=fake):
+        assert ea.get_coauthored_prs_count("testuser") == "1"
+        assert len(node_queries) == 1
+        # Next scan: only 2026 is searched and only the new commit's message is fetched.
+        prs["2026"].append(merged_pr("PR_4", "2026-10-17T09:00:00Z", "a2", "d1"))
+        node_queries.clear()
+        assert ea.get_coauthored_prs_count("testuser") == "2"
+    assert node_queries and '"C_d1"' in node_queries[0] and '"C_a2"' not in node_queries[0]
+    state = json.loads((temp_config_dir / "trailers" / "users" / "testuser.json").read_text())
+    assert (temp_config_dir / "trailers" / "commits.json").exists()
+    assert state["merged_since"] == "2026-10-17"
 
 
 @patch("earn_achievements.gh_json")
@@ -105,6 +192,24 @@ def test_get_total_stars(mock_gh_json):
     assert result == "175"
 
 
+@patch("earn_achievements.gh_json")
+def test_get_total_stars_streams_pages(mock_gh_json):
+    full_page = [{"stargazers_count": 1, "visibility": "public", "fork": False, "description": "x" * 100}] * ea.PAGE_SIZE
+    last_page = [{"stargazers_count": 5, "visibility": "private"}]
+    mock_gh_json.side_effect = [full_page, last_page]
+    assert ea.sum_repo_stars("testuser") == (ea.PAGE_SIZE + 5, ea.PAGE_SIZE)
+    calls = [c[0][0] for c in mock_gh_json.call_args_list]
+    assert calls == [
+        ["api", f"/users/testuser/repos?per_page={ea.PAGE_SIZE}&page=1"],
+        ["api", f"/users/testuser/repos?per_page={ea.PAGE_SIZE}&page=2"],
+    ]
+
+
+def test_iter_projected_keeps_only_fields():
+    with patch("earn_achievements.gh_json", return_value=[{"a": 1, "b": 2, "c": 3}]):
+        assert list(ea.iter_projected("/x?sort=updated", ("a", "c"))) == [{"a": 1, "c": 3}]
+
+
 @patch("earn_achievements.gh_json")
 def test_get_public_repos(mock_gh_json):
     mock_gh_json.return_value = {"public_repos": 15}
@@ -142,11 +247,907 @@ def test_get_total_issues(mock_gh_json):
 
 @patch("earn_achievements.gh_json")
 def test_get_gists_count(mock_gh_json):
-    mock_gh_json.return_value = [1, 2, 3, 4, 5]
+    mock_gh_json.return_value = {"public_gists": 5}
     result = ea.get_gists_count("testuser")
     assert result == "5"
 
 
+def test_fetch_concurrently_keeps_order_and_fallback():
+    def boom():
+        raise RuntimeError("API error")
+
+    tasks = {"b": lambda: "2", "a": boom, "c": lambda: "3"}
+    result = ea.fetch_concurrently(tasks, max_workers=2)
+    assert list(result) == ["b", "a", "c"]
+    assert result == {"b": "2", "a": "(unavailable)", "c": "3"}
+
+
+def make_event(event_id, created_at, kind="PushEvent", **payload):
+    return {"id": str(event_id), "type": kind, "created_at": created_at, "payload": payload}
+
+
+@patch("earn_achievements.gh_json")
+def test_search_contributions(mock_gh_json):
+    mock_gh_json.return_value = {"total_count": 7}
+    assert ea.search_contributions("testuser", "2026-01-01", "2026-12-31") == 21
+    assert mock_gh_json.call_count == 3
+
+
+def test_date_shards_are_calendar_aligned():
+    d = ea.date
+    assert ea.date_shards(d(2023, 11, 5), d(2024, 2, 10), "month") == [
+        (d(2023, 11, 5), d(2023, 11, 30)), (d(2023, 12, 1), d(2023, 12, 31)),
+        (d(2024, 1, 1), d(2024, 1, 31)), (d(2024, 2, 1), d(2024, 2, 10))]
+    assert ea.date_shards(d(2024, 12, 30), d(2025, 1, 1), "year") == [
+        (d(2024, 12, 30), d(2024, 12, 31)), (d(2025, 1, 1), d(2025, 1, 1))]
+    assert ea.shard_field("is:pr is:merged author:a") == "merged"
+    assert ea.shard_field("is:pr author:a") == "created"
+
+
+def test_search_count_shards_incomplete_results(temp_config_dir, monkeypatch):
+    monkeypatch.setattr(ea, "_frozen_time", datetime(2026, 10, 17, tzinfo=timezone.utc).timestamp())
+    queries = []
+
+    def fake(args):
+        q = args[-1][2:]
+        queries.append(q)
+        if "merged:" not in q:
+            return {"total_count": 90, "incomplete_results": True}
+        if "merged:2024-01-01..2024-12-31" in q:
+            return {"total_count": 40, "incomplete_results": True}
+        if "merged:2024-" in q or "merged:2026-" in q:
+            return {"total_count": 10, "incomplete_results": False}
+        return {"total_count": 1 if "merged:2020-" in q else 0, "incomplete_results": False}
+
+    with patch("earn_achievements.gh_json", side_effect=fake):
+        assert ea.search_count("is:pr is:merged author:a") == 12 * 10 + 10 + 1
+        assert len(queries) == 1 + 19 + 12
+        queries.clear()
+        assert ea.search_count("is:pr is:merged author:a") == 131
+    # Only the year that is still open is searched again, without the full-range attempt.
+    assert queries == ["is:pr is:merged author:a merged:2026-01-01..2026-10-17"]
+
+
+def test_badge_detector_resumes_from_cursors(temp_config_dir, monkeypatch):
+    monkeypatch.setattr(ea, "_frozen_time", datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc).timestamp())
+    issues = [{"id": "I1", "createdAt": "2026-01-01T00:00:00Z", "closedAt": "2026-01-01T00:04:00Z"},
+              {"id": "I2", "createdAt": "2026-01-02T00:00:00Z", "closedAt": "2026-01-02T01:00:00Z"},
+              {"id": "I3", "createdAt": "2026-01-03T00:00:00Z", "closedAt": None}]
+    prs = [{"id": "P1", "createdAt": "2026-02-01T00:00:00Z", "closedAt": "2026-02-01T00:01:00Z",
+            "mergedAt": "2026-02-01T00:01:00Z", "reviews": {"totalCount": 0}},
+           {"id": "P2", "createdAt": "2026-02-02T00:00:00Z", "closedAt": None, "mergedAt": None,
+            "reviews": {"totalCount": 0}}]
+    pages = []
+    nodes = {}
+
+    def connection(items, cursor):
+        start = int(cursor or 0)
+        return {"nodes": items[start:start + 2],
+                "pageInfo": {"hasNextPage": start + 2 < len(items), "endCursor": str(start + len(items[start:start + 2]))}}
+
+    def fake(args):
+        query = args[3]
+        if "node(id:" in query:
+            return {"data": {f"n{i}": nodes.get(node_id) for i, node_id in enumerate(query.split('"')[1::2])}}
+        fields = dict(arg.partition("=")[::2] for arg in args[5::2])
+        pages.append(fields)
+        user = {}
+        if "issues(first" in query:
+            user["issues"] = connection(issues, fields.get("issues"))
+        if "pullRequests(first" in query:
+            user["pullRequests"] = connection(prs, fields.get("pullRequests"))
+        return {"data": {"user": user}}
+
+    with patch("earn_achievements.gh_json", side_effect=fake):
+        assert ea.BadgeDetector("a").scan() == {"quickdraw": 2, "yolo": 1}
+        assert len(pages) == 2
+        assert ea.BadgeDetector("a").state["pending"] == ["P2"]
+        # P2 gets merged without review; one new issue was opened since.
+        nodes["P2"] = {**prs[1], "closedAt": "2026-03-01T00:00:00Z", "mergedAt": "2026-03-01T00:00:00Z"}
+        issues.append({"id": "I4", "createdAt": "2026-10-17T11:58:00Z", "closedAt": None})
+        pages.clear()
+        assert ea.BadgeDetector("a").scan() == {"quickdraw": 2, "yolo": 2}
+    assert pages == [{"login": "a", "issues": "3", "pullRequests": "2"}]
+    assert ea.BadgeDetector("a").state["pending"] == ["I4"]
+
+
+def test_contribution_weight():
+    assert ea.contribution_weight(make_event(1, "", size=3, distinct_size=2)) == 2
+    assert ea.contribution_weight(make_event(1, "", "PullRequestEvent", action="opened")) == 1
+    assert ea.contribution_weight(make_event(1, "", "PullRequestEvent", action="closed")) == 0
+    assert ea.contribution_weight(make_event(1, "", "CreateEvent", ref_type="branch")) == 0
+    assert ea.contribution_weight(make_event(1, "", "WatchEvent")) == 0
+
+
+@patch("earn_achievements.gh_json")
+def test_event_store_ingests_incrementally(mock_gh_json, temp_config_dir):
+    first = [make_event(3, "2026-03-02T00:00:00Z", size=2), make_event(2, "2026-03-01T00:00:00Z", "IssuesEvent", action="opened")]
+    mock_gh_json.return_value = first
+    store = ea.EventStore("testuser")
+    assert store.ingest() == 2
+    assert store.state["newest_id"] == "3"
+    assert store.state["coverage_start"] == "2026-03-01T00:00:00Z"
+
+    mock_gh_json.return_value = [make_event(4, "2026-03-03T00:00:00Z", size=1)] + first
+    store = ea.EventStore("testuser")
+    assert store.ingest() == 1
+    assert store.state["totals"] == {"2026": 4}
+    lines = store.path.read_text().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["2", "3", "4"]
+
+
+@patch("earn_achievements.gh_json")
+def test_event_store_year_total_uses_one_off_baseline(mock_gh_json, temp_config_dir):
+    mock_gh_json.return_value = [make_event(5, "2026-06-01T00:00:00Z", size=4)]
+    store = ea.EventStore("testuser")
+    store.ingest()
+    mock_gh_json.return_value = {"total_count": 10}
+    assert store.year_total(2026) == 34
+    assert "created:2026-01-01..2026-05-31" in mock_gh_json.call_args[0][0][-1]
+    mock_gh_json.reset_mock()
+    assert ea.EventStore("testuser").year_total(2026) == 34
+    mock_gh_json.assert_not_called()
+    assert store.year_total(2027) == 0
+
+
+@patch("earn_achievements.check_gh_installed")
+@patch("earn_achievements.gh_json")
+def test_status_output(mock_gh_json, mock_check, temp_config_dir, capsys):
+    mock_check.return_value = True
+
+    def fake(args):
+        if args == ["api", "user"]:
+            return {"login": "testuser"}
+        if args[1] == "/users/testuser":
+            return {"public_repos": 3, "followers": 4, "following": 5, "public_gists": 2}
+        if args[1].startswith("/users/testuser/repos"):
+            return [{"stargazers_count": 6}]
+        if args[1] == "/users/testuser/gists":
+            return [{}, {}]
+        if args[1].startswith("/users/testuser/events"):
+            return []
+        return {"total_count": 1}
+
+    mock_gh_json.side_effect = fake
+    with patch.object(sys, "argv", ["earn_achievements.py", "status", "--workers", "4"]):
+        result = ea.main()
+    assert result == 0
+    output = capsys.readouterr().out
+    assert "Pull Shark (merged PRs): 1" in output
+    assert "Starstruck (total stars): 6" in output
+    assert "Followers: 4" in output
+    assert "Gists: 2" in output
+    assert output.index("Followers") < output.index("Following") < output.index("Gists")
+
+
+@patch("earn_achievements._gh_json_uncached")
+def test_request_scope_shares_profile(mock_fetch):
+    mock_fetch.side_effect = lambda args: {"login": "testuser", "public_repos": 3, "followers": 4, "following": 5}
+    with ea.request_scope() as memo:
+        ea.gh_json(["api", "user"])
+        assert ea.get_public_repos("testuser") == "3"
+        assert ea.get_followers("testuser") == "4"
+        assert ea.get_following("testuser") == "5"
+    assert mock_fetch.call_count == 1
+    assert memo.misses == 1
+    assert memo.hits == 3
+
+
+@patch("earn_achievements._gh_json_uncached")
+def test_request_scope_is_per_run(mock_fetch):
+    mock_fetch.return_value = {"followers": 1}
+    with ea.request_scope():
+        ea.gh_json(["api", "/users/a"])
+        ea.gh_json(["api", "users/a"])
+    ea.gh_json(["api", "/users/a"])
+    ea.gh_json(["api", "/user/repos", "--method", "POST"])
+    assert mock_fetch.call_count == 3
+
+
+@patch("earn_achievements._gh_json_uncached")
+def test_request_scope_only_shares_reads(mock_fetch):
+    mock_fetch.return_value = {"number": 1}
+    create = ["api", "repos/x/y/issues", "-f", "title=Hi"]
+    mutation = ["api", "graphql", "-f", "query=mutation { addStar(input: {}) { clientMutationId } }"]
+    query = ["api", "graphql", "-f", "query=query { viewer { login } }"]
+    with ea.request_scope() as memo:
+        for args in (create, create, mutation, mutation, query, query):
+            ea.gh_json(args)
+    assert mock_fetch.call_count == 5
+    assert memo.hits == 1
+    assert ea._is_memoizable(["api", "/search/issues", "--method", "GET", "-f", "q=x"])
+    assert not ea._is_memoizable(["issue", "create"])
+
+
+@patch("earn_achievements._gh_json_uncached")
+def test_request_scope_does_not_hold_pages(mock_fetch):
+    def page(args):
+        number = int(args[1].rsplit("page=", 1)[1])
+        return [{"stargazers_count": 1, "visibility": "public"}] * (ea.PAGE_SIZE if number < 20 else 3)
+
+    mock_fetch.side_effect = page
+    with ea.request_scope() as memo:
+        assert ea.sum_repo_stars("a") == (19 * ea.PAGE_SIZE + 3, 19 * ea.PAGE_SIZE + 3)
+        assert not memo.has(["api", f"/users/a/repos?per_page={ea.PAGE_SIZE}&page=1"])
+    assert memo.misses == 0
+    assert mock_fetch.call_count == 20
+
+
+@patch("earn_achievements._gh_json_uncached")
+def test_request_scope_does_not_cache_errors(mock_fetch):
+    mock_fetch.side_effect = [RuntimeError("boom"), {"followers": 2}]
+    with ea.request_scope():
+        assert ea.get_followers("a") == "(unavailable)"
+        assert ea.get_followers("a") == "2"
+
+
+def test_is_cacheable():
+    assert ea.is_cacheable(["api", "/users/a"])
+    assert ea.is_cacheable(["api", "/search/issues", "--method", "GET", "-f", "q=x"])
+    assert not ea.is_cacheable(["api", "/search/issues", "-f", "q=x"])
+    assert not ea.is_cacheable(["api", "/users/a/repos", "--paginate"])
+    assert not ea.is_cacheable(["api", "graphql", "-f", "query=x"])
+    assert not ea.is_cacheable(["issue", "list"])
+
+
+def test_parse_http_output():
+    output = 'HTTP/2.0 200 OK\r\nEtag: "abc"\r\nContent-Type: application/json\r\n\r\n{"a": 1}'
+    status, headers, body = ea.parse_http_output(output)
+    assert status == 200
+    assert headers["etag"] == '"abc"'
+    assert body == '{"a": 1}'
+    assert ea.parse_http_output('{"a": 1}') == (None, {}, '{"a": 1}')
+
+
+def test_response_cache_lru_eviction(tmp_path):
+    cache = ea.ResponseCache(tmp_path / "cache.json", max_bytes=10)
+    cache.put("a", "aaaa", '"1"', None)
+    cache.put("b", "bbbb", '"2"', None)
+    cache.get("a")
+    cache.put("c", "cccc", '"3"', None)
+    assert cache.get("b") is None
+    assert cache.get("a")["body"] == "aaaa"
+    cache.put("d", "dddd", None, None)
+    assert cache.get("d") is None
+    cache.save()
+    reloaded = ea.ResponseCache(tmp_path / "cache.json", max_bytes=10)
+    assert len(reloaded) == 2
+    assert reloaded.size == 8
+
+
+@patch("earn_achievements.run")
+def test_persistent_cache_revalidates_with_etag(mock_run, temp_config_dir):
+    mock_run.return_value.returncode = 0
+    mock_run.return_value.stdout = 'HTTP/2.0 200 OK\nETag: "v1"\n\n{"followers": 9}'
+    with ea.persistent_cache():
+        assert ea.get_followers("a") == "9"
+    assert ea.cache_file().exists()
+
+    mock_run.return_value.returncode = 1
+    mock_run.return_value.stdout = 'HTTP/2.0 304 Not Modified\nETag: "v1"\n\n'
+    mock_run.return_value.stderr = "gh: HTTP 304"
+    with ea.persistent_cache() as cache:
+        assert ea.get_followers("a") == "9"
+    assert cache.revalidated == 1
+    cmd = mock_run.call_args[0][0]
+    assert 'If-None-Match: "v1"' in cmd
+
+
+def test_cache_clear_command(temp_config_dir, capsys):
+    cache = ea.open_response_cache()
+    cache.put("k", "{}", '"e"', None)
+    cache.save()
+    with patch.object(sys, "argv", ["earn_achievements.py", "cache", "clear"]):
+        assert ea.main() == 0
+    assert len(ea.open_response_cache()) == 0
+    with patch.object(sys, "argv", ["earn_achievements.py", "cache", "stats"]):
+        assert ea.main() == 0
+    assert "Entries: 0" in capsys.readouterr().out
+
+
+def test_parse_api_args():
+    spec = ea.parse_api_args(["api", "/search/issues", "--method", "GET", "-f", "q=is:pr author:a"])
+    assert spec["method"] == "GET"
+    assert spec["path"] == "/search/issues?q=is%3Apr+author%3Aa"
+    spec = ea.parse_api_args(["api", "graphql", "-f", "query=query($n: Int) { x }", "-F", "n=3"])
+    assert spec["method"] == "POST"
+    assert json.loads(spec["body"]) == {"query": "query($n: Int) { x }", "variables": {"n": 3}}
+    assert ea.parse_api_args(["api", "user", "--paginate"])["paginate"] is True
+    assert ea.parse_api_args(["api", "user", "--jq", ".login"]) is None
+    assert ea.parse_api_args(["issue", "list"]) is None
+
+
+@pytest.fixture
+def api_server():
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            requests.append((self.path, self.headers.get("Authorization")))
+            port = self.server.server_address[1]
+            if self.path.startswith("/users/a/repos"):
+                page = 2 if "page=2" in self.path else 1
+                body = json.dumps([{"stargazers_count": page}])
+                extra = {"Link": f'<http://127.0.0.1:{port}/users/a/repos?page=2>; rel="next"'} if page == 1 else {}
+                status = 200
+            elif self.path == "/missing":
+                body, extra, status = json.dumps({"message": "Not Found"}), {}, 404
+            else:
+                body, extra, status = json.dumps({"login": "a"}), {"ETag": '"e1"'}, 200
+            self.send_response(status)
+            for name, value in extra.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_transport_pools_connections(api_server):
+    base_url, requests = api_server
+    transport = ea.HttpTransport("tok", base_url=base_url)
+    with ea.use_transport(transport):
+        assert ea.gh_json(["api", "user"]) == {"login": "a"}
+        assert ea.gh_json(["api", "/users/a/repos", "--paginate"]) == [{"stargazers_count": 1}, {"stargazers_count": 2}]
+        with pytest.raises(RuntimeError, match="Not Found"):
+            ea.gh_json(["api", "/missing"])
+    assert transport.connections_opened == 1
+    assert requests[0] == ("/user", "Bearer tok")
+    assert ea.get_transport().name == "gh"
+
+
+def test_make_transport_auto(monkeypatch):
+    monkeypatch.delenv("GH_TOKEN", raising=False)
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    assert ea.make_transport("auto").name == "gh"
+    monkeypatch.setenv("GH_TOKEN", "tok")
+    assert ea.make_transport("auto").name == "http"
+    assert ea.make_transport("gh").name == "gh"
+
+
+GRAPHQL_RESPONSE = {
+    "data": {
+        "user": {
+            "followers": {"totalCount": 4},
+            "following": {"totalCount": 5},
+            "public_repos": {"totalCount": 3},
+            "gists": {"totalCount": 2},
+            "accepted_answers": {"totalCount": 9},
+            "total_stars": {"nodes": [{"stargazerCount": 6}], "pageInfo": {"hasNextPage": False, "endCursor": None}},
+            "year_contributions": {"contributionCalendar": {"totalContributions": 321}},
+        },
+        "merged_prs": {"issueCount": 17},
+        "coauthored_prs": {"issueCount": 2},
+        "total_prs": {"issueCount": 20},
+        "total_issues": {"issueCount": 8},
+    }
+}
+
+
+@patch("earn_achievements.gh_json")
+def test_fetch_graphql_metrics_single_call(mock_gh_json):
+    mock_gh_json.return_value = GRAPHQL_RESPONSE
+    result = ea.fetch_graphql_metrics("testuser", list(ea.GRAPHQL_METRICS))
+    assert mock_gh_json.call_count == 1
+    assert result["merged_prs"] == 17
+    assert result["total_stars"] == 6
+    assert result["year_contributions"] == 321
+    assert result["accepted_answers"] == 9
+    args = mock_gh_json.call_args[0][0]
+    assert "merged_prs=is:pr is:merged author:testuser" in args
+
+
+@patch("earn_achievements.gh_json")
+def test_fetch_graphql_metrics_pages_stars(mock_gh_json):
+    first = {"data": {"user": {"total_stars": {"nodes": [{"stargazerCount": 1}], "pageInfo": {"hasNextPage": True, "endCursor": "c1"}}}}}
+    second = {"data": {"user": {"total_stars": {"nodes": [{"stargazerCount": 2}], "pageInfo": {"hasNextPage": False, "endCursor": None}}}}}
+    mock_gh_json.side_effect = [first, second]
+    assert ea.fetch_graphql_metrics("testuser", ["total_stars"]) == {"total_stars": 3}
+    assert "cursor=c1" in mock_gh_json.call_args[0][0]
+
+
+@patch("earn_achievements.gh_json")
+def test_fetch_status_metrics_falls_back_to_rest(mock_gh_json, temp_config_dir):
+    def fake(args):
+        if args[1] == "graphql":
+            raise RuntimeError("Your token has not been granted the required scopes")
+        if args[1] == "/users/testuser":
+            return {"followers": 4}
+        return {"total_count": 1}
+
+    mock_gh_json.side_effect = fake
+    result = ea.fetch_status_metrics("testuser", max_workers=2)
+    assert result["followers"] == "4"
+    assert result["merged_prs"] == "1"
+    assert list(result) == list(ea.STATUS_METRICS)
+    # GraphQL-only cannot answer now, so the value fetched above is served as stale.
+    assert ea.fetch_status_metrics("testuser", source="graphql")["followers"] == "4 (stale, 1m old)"
+    assert ea.fetch_status_metrics("other", source="graphql")["followers"] == "(unavailable)"
+
+
+def test_last_good_store_respects_ttl(temp_config_dir):
+    ea.save_config({"stale_ttl": {"followers": 60}})
+    store = ea.LastGoodStore("a")
+    store.update({"followers": 5, "merged_prs": 7, "bogus": None})
+    store = ea.LastGoodStore("a")
+    assert store.get("followers")[0] == 5
+    assert store.get("bogus") is None
+    store.values["followers"]["ts"] -= 120
+    store.values["merged_prs"]["ts"] -= 120
+    assert store.get("followers") is None
+    assert store.get("merged_prs")[0] == 7
+    assert ea.format_age(2 * 86400 + 5) == "2d"
+
+
+@patch("earn_achievements.gh_json")
+def test_graphql_search_counts_are_rechecked_when_large(mock_gh_json, temp_config_dir):
+    response = {"data": {"merged_prs": {"issueCount": 900}, "total_prs": {"issueCount": 20}}}
+    mock_gh_json.side_effect = lambda args: response if args[1] == "graphql" else {"total_count": 1010}
+    assert ea.fetch_graphql_metrics("a", ["merged_prs", "total_prs"]) == {"merged_prs": 1010, "total_prs": 20}
+    rest = [c[0][0] for c in mock_gh_json.call_args_list if c[0][0][1] == "/search/issues"]
+    assert rest == [["api", "/search/issues", "--method", "GET", "-f", "q=is:pr is:merged author:a"]]
+
+
+@patch("earn_achievements.gh_json")
+def test_fetch_status_metrics_prefers_graphql(mock_gh_json, temp_config_dir):
+    def fake(args):
+        if args[1] != "graphql":
+            return []
+        if "pullRequests(first" in args[3]:
+            return EMPTY_BADGE_PAGE
+        return EMPTY_PR_SEARCH if args[-1].startswith("q=") else GRAPHQL_RESPONSE
+
+    mock_gh_json.side_effect = fake
+    result = ea.fetch_status_metrics("testuser")
+    assert result["followers"] == "4"
+    assert result["year_contributions"] == "321"
+    assert result["coauthored_prs"] == "0"
+    assert result["accepted_answers"] == "9"
+    calls = [c[0][0] for c in mock_gh_json.call_args_list]
+    assert len([args for args in calls if args[1] == "graphql" and "search(" in args[3]]) == 2
+    assert len([args for args in calls if args[1] != "graphql"]) == 1
+
+
+class FakeTransport:
+    name = "fake"
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, args, headers=None):
+        self.calls.append(args)
+        return self.responses.pop(0)
+
+    def close(self):
+        pass
+
+
+def test_token_bucket_paces_after_burst():
+    now = [0.0]
+    bucket = ea.TokenBucket(rate=0.5, capacity=2, clock=lambda: now[0])
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(2.0)
+    now[0] = 10.0
+    assert bucket.reserve() == 0.0
+
+
+def budget_headers(remaining, limit=5000):
+    return {"x-ratelimit-resource": "core", "x-ratelimit-limit": str(limit),
+            "x-ratelimit-remaining": str(remaining), "x-ratelimit-reset": str(int(time.time()) + 3000)}
+
+
+def test_scheduler_only_paces_near_the_reserve():
+    sleeps = []
+    scheduler = ea.RateLimitScheduler(sleep=sleeps.append)
+    transport = FakeTransport([ea.ApiResponse(200, budget_headers(4900 - i), "{}") for i in range(400)])
+    for _ in range(400):
+        scheduler.send(transport, ["api", "/users/a"], {})
+    assert sleeps == []
+
+    transport = FakeTransport([ea.ApiResponse(200, budget_headers(100), "{}")] * 3)
+    for _ in range(3):
+        scheduler.send(transport, ["api", "/users/a"], {})
+    assert sleeps and sleeps[-1] > 1
+
+
+def test_scheduler_retries_throttled_requests():
+    sleeps = []
+    throttled = ea.ApiResponse(429, {"retry-after": "3"}, "{}", "rate limited (HTTP 429)")
+    ok = ea.ApiResponse(200, {"x-ratelimit-resource": "search", "x-ratelimit-limit": "30",
+                              "x-ratelimit-remaining": "28", "x-ratelimit-reset": "4102444800"}, '{"total_count": 1}')
+    transport = FakeTransport([throttled, ok])
+    scheduler = ea.RateLimitScheduler(sleep=sleeps.append)
+    response = scheduler.send(transport, ["api", "/search/issues"], {})
+    assert response.status == 200
+    assert scheduler.retries == 1
+    assert 3.0 <= sleeps[-1] <= 4.0
+    assert scheduler.budget["search"]["remaining"] == 28
+    assert "search 28/30" in scheduler.summary()
+
+
+def test_tracer_records_api_spans():
+    throttled = ea.ApiResponse(429, {"retry-after": "0"}, "{}", "rate limited (HTTP 429)")
+    search = ea.ApiResponse(200, {}, '{"total_count": 4}')
+    profile = ea.ApiResponse(200, {}, '{"followers": 3}')
+    transport = FakeTransport([throttled, search, profile])
+    scheduler = ea.RateLimitScheduler(sleep=lambda s: None)
+    with ea.use_transport(transport), ea.rate_limit_scope(scheduler), ea.request_scope(), \
+            ea.trace_scope() as tracer:
+        assert ea.search_count("is:pr author:a") == 4
+        assert ea.get_followers("a") == "3"
+        assert ea.get_followers("a") == "3"
+    assert ea._tracer is None
+    spans = {(s["name"], s["args"]["cache"]): s["args"] for s in tracer.spans if s["cat"] == "api"}
+    assert spans[("/search/issues", "none")]["retries"] == 1
+    assert spans[("/users/a", "none")]["bytes"] == len('{"followers": 3}')
+    assert ("/users/a", "memo") in spans
+    lines = tracer.summary().splitlines()
+    assert lines[1].split()[:4] == ["4.0", "1", "0", "1"]
+    assert lines[2].split()[:3] == ["1.0", "2", "1"]
+    events = tracer.chrome_trace()["traceEvents"]
+    assert {e["ph"] for e in events} == {"X"}
+    assert all(e["dur"] >= 0 for e in events)
+
+
+def test_trace_file_written(temp_config_dir, tmp_path, capsys):
+    trace = tmp_path / "trace.json"
+    with patch.object(sys, "argv", ["earn_achievements.py", "--trace-file", str(trace), "config", "--show"]):
+        assert ea.main() == 0
+    assert json.loads(trace.read_text()) == {"traceEvents": [], "displayTimeUnit": "ms"}
+
+
+def test_scheduler_does_not_retry_real_errors():
+    transport = FakeTransport([ea.ApiResponse(403, {}, '{"message": "Resource not accessible"}', "Resource not accessible (HTTP 403)")])
+    scheduler = ea.RateLimitScheduler(sleep=lambda s: None)
+    with ea.use_transport(transport), ea.rate_limit_scope(scheduler):
+        assert ea.get_followers("a") == "(unavailable)"
+    assert scheduler.retries == 0
+    assert len(transport.calls) == 1
+
+
+def test_scheduler_gives_up_after_max_retries():
+    throttled = ea.ApiResponse(403, {"x-ratelimit-remaining": "0"}, "{}", "API rate limit exceeded (HTTP 403)")
+    transport = FakeTransport([throttled] * 3)
+    scheduler = ea.RateLimitScheduler(sleep=lambda s: None, max_retries=2)
+    assert scheduler.send(transport, ["api", "user"], {}).status == 403
+    assert scheduler.retries == 2
+
+
+def test_load_users_file(tmp_path):
+    users_file = tmp_path / "users.txt"
+    users_file.write_text("alice\n# comment\n\nbob  # lead\nalice\n")
+    assert ea.load_users_file(str(users_file)) == ["alice", "bob"]
+
+
+@patch("earn_achievements.fetch_status_metrics")
+def test_batch_status_streams_and_resumes(mock_fetch, tmp_path):
+    mock_fetch.side_effect = lambda login, max_workers, source: {"merged_prs": str(len(login)), "gists": "(unavailable)"}
+    checkpoint = tmp_path / "scan.jsonl"
+    checkpoint.write_text(json.dumps({"user": "alice", "merged_prs": 5}) + "\n" + '{"user": "bo')
+    out = []
+
+    class Out:
+        def write(self, text):
+            out.append(text)
+
+        def flush(self):
+            pass
+
+    fetched = ea.run_batch_status(["alice", "bob", "carol"], max_workers=2, checkpoint=checkpoint, out=Out())
+    assert fetched == 2
+    records = [json.loads(line) for line in "".join(out).splitlines()]
+    assert sorted(r["user"] for r in records) == ["bob", "carol"]
+    assert {"user": "bob", "merged_prs": 3, "gists": "(unavailable)"} in records
+    assert set(ea.read_checkpoint(checkpoint)) == {"alice", "bob", "carol"}
+
+    mock_fetch.reset_mock()
+    assert ea.run_batch_status(["alice", "bob", "carol"], checkpoint=checkpoint, out=Out()) == 0
+    mock_fetch.assert_not_called()
+
+
+@patch("earn_achievements._gh_json_uncached")
+def test_batch_status_memo_is_per_user(mock_fetch, temp_config_dir):
+    mock_fetch.side_effect = lambda args: {"public_repos": 1, "followers": 2, "following": 3, "public_gists": 4}
+    out = []
+
+    class Out:
+        write = out.append
+
+        def flush(self):
+            pass
+
+    with ea.request_scope() as memo:
+        assert ea.run_batch_status(["alice", "bob"], max_workers=2, source="rest", out=Out()) == 2
+    assert memo.misses == 0
+    profiles = [c[0][0] for c in mock_fetch.call_args_list if c[0][0][1].startswith("/users/") and "?" not in c[0][0][1]]
+    assert sorted(profiles) == [["api", "/users/alice"], ["api", "/users/bob"]]
+
+
+def test_snapshot_store_series_and_latest(temp_config_dir):
+    store = ea.SnapshotStore()
+    store.record("a", {"merged_prs": "2", "gists": "(unavailable)"}, ts=86400 * 10)
+    store.record("a", {"merged_prs": 6, "total_stars": 1}, ts=86400 * 20)
+    store.record("b", {"merged_prs": 1}, ts=86400 * 30)
+    assert store.series("a", "merged_prs") == [(864000, 2), (1728000, 6)]
+    assert store.series("a", "merged_prs", since=86400 * 15) == [(1728000, 6)]
+    assert store.latest("a") == (1728000, {"merged_prs": 6, "total_stars": 1})
+    assert store.metrics("a") == ["merged_prs", "total_stars"]
+    assert store.last_user() == "b"
+    store.close()
+
+
+def test_tiers_and_eta(temp_config_dir):
+    assert ea.achievement_tier("pull_shark", 20) == 2
+    assert ea.next_threshold("pull_shark", 20) == 128
+    assert ea.next_threshold("pull_shark", 5000) is None
+    series = [(0, 10), (86400 * 10, 20)]
+    assert ea.days_until(series, 30) == pytest.approx(10)
+    assert ea.days_until([(0, 5), (86400, 5)], 16) is None
+
+
+def test_history_command(temp_config_dir, capsys):
+    store = ea.SnapshotStore()
+    now = int(ea.time.time())
+    store.record("testuser", {"merged_prs": 10}, ts=now - 86400 * 6)
+    store.record("testuser", {"merged_prs": 13}, ts=now)
+    store.close()
+    with patch.object(sys, "argv", ["earn_achievements.py", "history", "--weekly"]):
+        assert ea.main() == 0
+    output = capsys.readouterr().out
+    assert "merged_prs: 13 (+3 over 2 snapshots)" in output
+    assert "pull_shark: 3 to go for 16 (~6 days at the current rate)" in output
+
+
+def test_plan_metrics_prefers_graphql_and_shared_profile(temp_config_dir):
+    plan = ea.plan_metrics(list(ea.STATUS_METRICS), ea.metric_sources("a"))
+    names = {source.name: assigned for source, assigned in plan}
+    assert set(names) == {"graphql", "events", "trailers", "badges"}
+    assert names["events"] == ["contributions"]
+    assert names["trailers"] == ["coauthored_prs"]
+
+    plan = ea.plan_metrics(list(ea.STATUS_METRICS), ea.metric_sources("a", source="rest"))
+    names = {source.name: assigned for source, assigned in plan}
+    assert names["profile"] == ["public_repos", "followers", "following", "gists"]
+    assert names["repos"] == ["total_stars"]
+    assert names["events"] == ["contributions", "year_contributions"]
+    assert "search:merged_prs" in names
+
+
+@patch("earn_achievements.gh_json")
+def test_accepted_answers_over_rest_source(mock_gh_json, temp_config_dir):
+    mock_gh_json.return_value = {"data": {"user": {"accepted_answers": {"totalCount": 9}}}}
+    assert ea.collect_metrics("a", ["accepted_answers"], source="rest") == {"accepted_answers": 9}
+    assert "onlyAnswers: true" in mock_gh_json.call_args[0][0][3]
+    assert ea.achievement_tier("galaxy_brain", 9) == 2
+
+
+def test_plan_metrics_uses_fresh_snapshot(temp_config_dir):
+    store = ea.SnapshotStore()
+    store.record("a", {"merged_prs": 5, "followers": 2})
+    store.close()
+    plan = ea.plan_metrics(["merged_prs", "followers", "following"], ea.metric_sources("a", max_age=3600))
+    assert [(source.name, assigned) for source, assigned in plan] == [("snapshot", ["merged_prs", "followers"]),
+                                                                      ("graphql", ["following"])]
+
+
+@patch("earn_achievements.gh_json")
+def test_collect_metrics_replans_after_failure(mock_gh_json, temp_config_dir):
+    def fake(args):
+        if args[1] == "graphql":
+            raise RuntimeError("INSUFFICIENT_SCOPES")
+        if args[1] == "/users/a":
+            return {"followers": 4, "public_gists": 7}
+        raise RuntimeError("search down")
+
+    mock_gh_json.side_effect = fake
+    result = ea.collect_metrics("a", ["followers", "gists", "merged_prs"])
+    assert result == {"followers": 4, "gists": 7}
+
+
+@patch("earn_achievements.gh_json")
+def test_list_open_issue_titles_reads_all_pages(mock_gh_json):
+    first = [{"title": f"Issue {i}"} for i in range(ea.PAGE_SIZE - 1)] + [{"title": "A PR", "pull_request": {}}]
+    mock_gh_json.side_effect = [first, [{"title": "Last"}]]
+    titles = ea.list_open_issue_titles("o/r")
+    assert len(titles) == ea.PAGE_SIZE
+    assert titles[-1] == "Last"
+    assert "A PR" not in titles
+
+
+def test_title_key_normalizes():
+    assert ea.title_key("Pull Shark:  find 2 ") == ea.title_key("pull shark: find 2")
+    assert ea.title_key("Pull Shark") != ea.title_key("YOLO")
+
+
+@patch("earn_achievements.check_gh_installed", return_value=True)
+@patch("earn_achievements.run")
+@patch("earn_achievements.gh_json")
+def test_seed_creates_only_missing_issues(mock_gh_json, mock_run, mock_check, temp_config_dir, capsys):
+    def fake(args):
+        if "labels=achievement-seed" in args[1]:
+            return [{"title": "Pull Shark: find 2 good starter issues"}]
+        return [{"title": "Pull Shark: find 2 good starter issues"}, {"title": "  yolo: merge a PR without review"}]
+
+    mock_gh_json.side_effect = fake
+    mock_run.return_value.returncode = 0
+    with patch.object(sys, "argv", ["earn_achievements.py", "seed", "--workers", "3"]):
+        assert ea.main() == 0
+    commands = [c[0][0] for c in mock_run.call_args_list]
+    creates = [c for c in commands if c[:3] == ["gh", "issue", "create"]]
+    assert len(creates) == 9
+    assert all(c[-2:] == ["--label", ea.SEED_LABEL] for c in creates)
+    assert ["gh", "label", "create", ea.SEED_LABEL] == commands[0][:4]
+    output = capsys.readouterr().out
+    assert output.index("Created: Pair Extraordinaire") < output.index("Created: Llama")
+    assert "YOLO" not in output
+
+
+@patch("earn_achievements.check_gh_installed", return_value=True)
+@patch("earn_achievements.run")
+@patch("earn_achievements.gh_json")
+def test_seed_all_labelled_issues_exist(mock_gh_json, mock_run, mock_check, temp_config_dir, capsys):
+    mock_gh_json.return_value = [{"title": t} for t in [
+        "Pull Shark: find 2 good starter issues", "Pair Extraordinaire: co-author a commit",
+        "Quickdraw: open + close a small issue", "YOLO: merge a PR without review",
+        "Galaxy Brain: answer 2 Q&A discussions", "Public Sponsor: pick a project to sponsor",
+        "Starstruck: build a star-worthy repo", "Hacker: create first public repo", "Founder: create first repo",
+        "Developer: set profile picture", "Llama: reach 1000 contributions"]]
+    with patch.object(sys, "argv", ["earn_achievements.py", "seed"]):
+        assert ea.main() == 0
+    assert mock_gh_json.call_count == 1
+    mock_run.assert_not_called()
+    assert "All achievement issues already exist." in capsys.readouterr().out
+
+
+@patch("earn_achievements.collect_metrics")
+def test_watcher_backs_off_and_emits_changes(mock_collect, temp_config_dir):
+    now = [1000.0]
+    events = []
+    values = {"merged_prs": 15, "followers": 3}
+    mock_collect.side_effect = lambda user, metrics, source: {m: values[m] for m in metrics}
+    watcher = ea.Watcher("a", ["merged_prs", "followers"], min_interval=10, max_interval=40,
+                         emit=events.append, clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+
+    watcher.poll_once()
+    assert events[0]["event"] == "snapshot"
+    assert events[0]["values"] == {"merged_prs": 15, "followers": 3}
+
+    watcher.run(iterations=3)
+    assert watcher.intervals == {"merged_prs": 40, "followers": 40}
+    assert len(events) == 1
+
+    values["merged_prs"] = 16
+    now[0] = watcher.next_due["merged_prs"]
+    assert watcher.poll_once() == ["merged_prs"]
+    assert watcher.intervals["merged_prs"] == 10
+    change, tier = events[1], events[2]
+    assert (change["event"], change["old"], change["new"]) == ("change", 15, 16)
+    assert (tier["event"], tier["achievement"], tier["old_tier"], tier["tier"], tier["threshold"]) == ("tier", "pull_shark", 1, 2, 16)
+    assert ea.SnapshotStore().latest("a")[1] == {"merged_prs": 16, "followers": 3}
+
+
+@patch("earn_achievements.collect_metrics")
+def test_watcher_polls_only_due_metrics(mock_collect, temp_config_dir):
+    now = [0.0]
+    mock_collect.side_effect = lambda user, metrics, source: {m: 1 for m in metrics}
+    watcher = ea.Watcher("a", ["followers", "gists"], min_interval=10, emit=lambda e: None,
+                         clock=lambda: now[0], history=False)
+    watcher.poll_once()
+    watcher.intervals["gists"] = 100
+    watcher.next_due["gists"] = 100
+    now[0] = 20
+    watcher.poll_once()
+    assert mock_collect.call_args[0][1] == ["followers"]
+
+
+def test_webhook_deltas():
+    merged = {"action": "closed", "pull_request": {"merged": True, "user": {"login": "a"}}}
+    closed = {"action": "closed", "pull_request": {"merged": False, "user": {"login": "a"}}}
+    assert ea.webhook_deltas("pull_request", merged) == [("a", "merged_prs", 1)]
+    assert ea.webhook_deltas("pull_request", closed) == []
+    assert ea.webhook_deltas("star", {"action": "deleted", "repository": {"owner": {"login": "o"}}}) == \
+        [("o", "total_stars", -1)]
+    assert ea.webhook_deltas("discussion", {"action": "answered", "answer": {"user": {"login": "b"}}}) == \
+        [("b", "accepted_answers", 1)]
+    assert ea.webhook_deltas("ping", {"zen": "hi"}) == []
+
+
+def test_verify_signature():
+    body = b'{"action": "opened"}'
+    good = "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    assert ea.verify_signature(b"s3cret", body, good)
+    assert not ea.verify_signature(b"other", body, good)
+    assert not ea.verify_signature(b"s3cret", body, "")
+
+
+def test_serve_webhooks_replay(temp_config_dir, tmp_path, capsys):
+    wrapped = tmp_path / "star.json"
+    wrapped.write_text(json.dumps({"event": "star", "payload": {
+        "action": "created", "repository": {"owner": {"login": "o"}}}}))
+    raw = tmp_path / "issue.json"
+    raw.write_text(json.dumps({"action": "opened", "issue": {"user": {"login": "o"}}}))
+    with patch.object(sys, "argv", ["earn_achievements.py", "serve-webhooks", "--replay", str(wrapped)]):
+        assert ea.main() == 0
+    with patch.object(sys, "argv", ["earn_achievements.py", "serve-webhooks",
+                                    "--event", "issues", "--replay", str(raw)]):
+        assert ea.main() == 0
+    assert ea.CounterStore().get("o") == {"total_stars": 1, "total_issues": 1}
+
+
+def test_webhook_handler_verifies_and_dedupes(temp_config_dir):
+    store = ea.CounterStore()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ea.make_webhook_handler(store, b"s3cret"))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    body = json.dumps({"action": "opened", "issue": {"user": {"login": "a"}}}).encode()
+
+    def post(signature, delivery="d1"):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        conn.request("POST", "/", body, {"X-GitHub-Event": "issues", "X-GitHub-Delivery": delivery,
+                                         "X-Hub-Signature-256": signature})
+        status = conn.getresponse().status
+        conn.close()
+        return status
+
+    try:
+        signature = "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+        assert post("sha256=bad") == 401
+        assert post(signature) == 204
+        assert post(signature) == 204
+        assert store.get("a") == {"total_issues": 1}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@patch("earn_achievements.check_gh_installed", return_value=True)
+def test_status_record_then_replay_is_identical(mock_check, temp_config_dir, tmp_path, capsys):
+    def fake(args):
+        if args == ["api", "user"]:
+            return {"login": "testuser"}
+        if args[1] == "graphql":
+            raise RuntimeError("INSUFFICIENT_SCOPES")
+        if args[1] == "/users/testuser":
+            return {"public_repos": 3, "followers": 4, "following": 5, "public_gists": 2}
+        if args[1].startswith("/users/testuser/repos"):
+            return [{"stargazers_count": 6, "visibility": "public"}]
+        if args[1].startswith("/users/testuser/events"):
+            return []
+        return {"total_count": 2}
+
+    cassette = tmp_path / "cassette"
+    argv = ["earn_achievements.py", "--record", str(cassette), "status"]
+    with patch("earn_achievements._gh_json_traced", side_effect=fake), patch.object(sys, "argv", argv):
+        assert ea.main() == 0
+    recorded = capsys.readouterr().out
+    assert "Followers: 4" in recorded
+    assert ea.SnapshotStore().metrics("testuser") == []
+
+    argv = ["earn_achievements.py", "--replay", str(cassette), "status"]
+    with patch("earn_achievements._gh_json_traced", side_effect=AssertionError("network")), \
+            patch("subprocess.run", side_effect=AssertionError("subprocess")), patch.object(sys, "argv", argv):
+        assert ea.main() == 0
+    assert capsys.readouterr().out == recorded
+
+
+def test_replay_missing_cassette(temp_config_dir, tmp_path, capsys):
+    with patch.object(sys, "argv", ["earn_achievements.py", "--replay", str(tmp_path), "status"]):
+        assert ea.main() == 1
+    assert "cannot read cassette" in capsys.readouterr().err
+
+
 def test_status_help(capsys):
     with patch.object(sys, "argv", ["earn_achievements.py"]):
         with pytest.raises(SystemExit):
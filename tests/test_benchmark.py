@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import benchmark
+import earn_achievements as ea
+
+
+def test_mock_graphql_matches_rest():
+    fixtures = benchmark.build_fixtures(users=1, big_repos=250)
+    with benchmark.MockGitHub(fixtures) as mock:
+        transport = ea.HttpTransport("token", base_url=mock.url)
+        with ea.use_transport(transport), ea.request_scope():
+            graphql = ea.fetch_graphql_metrics(benchmark.BIG_USER, ["total_stars", "public_repos", "merged_prs"])
+            stars, public = ea.sum_repo_stars(benchmark.BIG_USER)
+            merged = ea.search_count(ea.SEARCH_QUERIES["merged_prs"].format(user=benchmark.BIG_USER))
+    assert graphql == {"total_stars": stars, "public_repos": public, "merged_prs": merged}
+    assert mock.requests == 2 + 3 + 1  # two GraphQL pages, three REST pages, one search
+
+
+def test_mock_throttles_every_nth_request():
+    with benchmark.MockGitHub(benchmark.build_fixtures(), throttle_every=2) as mock:
+        assert mock.route("GET", "/user", None)[0] == 200
+        status, _, headers = mock.route("GET", "/user", None)
+    assert status == 429
+    assert headers["Retry-After"] == "0"
+
+
+def test_compare_flags_regressions():
+    base = {"s": {"requests": 3, "gh_processes": 1, "wall_ms": 100.0, "peak_rss_mb": 30.0}}
+    same = {"s": {"requests": 3, "gh_processes": 1, "wall_ms": 110.0, "peak_rss_mb": 30.0}}
+    worse = {"s": {"requests": 4, "gh_processes": 1, "wall_ms": 200.0, "peak_rss_mb": 30.0}}
+    assert benchmark.compare(same, base, tolerance=0.25) == []
+    problems = benchmark.compare(worse, base, tolerance=0.25)
+    assert len(problems) == 2
+    assert problems[0] == "s: requests 3 -> 4"
+    assert benchmark.compare(worse, base, tolerance=0.25, counts_only=True) == ["s: requests 3 -> 4"]
+
+
+def test_run_scenario_end_to_end():
+    scenario = next(s for s in benchmark.SCENARIOS if s.name == "stats-page")
+    result = benchmark.run_scenario(scenario)
+    assert result["exit"] == 0
+    assert result["requests"] >= 2
+    assert result["gh_processes"] == 0
+    assert result["peak_rss_mb"] > 0
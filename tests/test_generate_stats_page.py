@@ -0,0 +1,200 @@
+import gzip
+import json
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import earn_achievements as ea
+import generate_stats_page as gsp
+
+
+@pytest.fixture(autouse=True)
+def isolated_probe(monkeypatch, tmp_path):
+    monkeypatch.setattr(ea, "probe_file", lambda: tmp_path / "probe.json")
+
+
+@pytest.fixture
+def temp_config_dir(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config_dir = Path(tmpdir) / ".config" / "github-achievements"
+        config_dir.mkdir(parents=True)
+        monkeypatch.setattr(ea, "CONFIG_FILE", config_dir / "config.json")
+        yield config_dir
+
+
+@patch("earn_achievements.gh_json")
+def test_get_stats_matches_status_metrics(mock_gh_json, temp_config_dir):
+    def fake(args):
+        if args == ["api", "user"]:
+            return {"login": "testuser"}
+        if args[1] == "graphql" and args[-1].startswith("q="):
+            return {"data": {"search": {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}}}
+        if args[1] == "graphql":
+            raise RuntimeError("INSUFFICIENT_SCOPES")
+        if args[1] == "/users/testuser":
+            return {"public_repos": 3, "followers": 4, "following": 5}
+        if args[1].startswith("/users/testuser/repos"):
+            return [{"stargazers_count": 6, "visibility": "public"}, {"stargazers_count": 1, "visibility": "private"}]
+        return {"total_count": 2}
+
+    mock_gh_json.side_effect = fake
+    stats = gsp.get_stats()
+    status = ea.fetch_status_metrics("testuser", source="rest")
+    assert stats["user"] == "testuser"
+    for metric in gsp.PAGE_METRICS:
+        assert str(stats[metric]) == status[metric]
+    assert stats["public_repos"] == 3
+
+
+def test_get_stats_from_history(temp_config_dir):
+    store = ea.SnapshotStore()
+    store.record("testuser", {"merged_prs": 3, "followers": "9"}, ts=1000)
+    store.record("testuser", {"merged_prs": 5}, ts=2000)
+    store.close()
+    stats = gsp.get_stats_from_history()
+    assert stats["user"] == "testuser"
+    assert stats["merged_prs"] == 5
+    assert stats["followers"] == 9
+    assert stats["total_stars"] == "N/A"
+    assert stats["updated"] == gsp.datetime.fromtimestamp(2000).isoformat()
+
+
+def test_get_stats_from_history_empty(temp_config_dir):
+    with pytest.raises(RuntimeError, match="no recorded history"):
+        gsp.get_stats_from_history()
+
+
+def test_generate_html_contains_stats():
+    stats = {"user": "testuser", "updated": "2026-01-02T03:04:05.123", "merged_prs": 17, "coauthored_prs": 2,
+             "total_stars": 6, "public_repos": 3, "followers": 4, "following": 5}
+    html = gsp.generate_html(stats)
+    assert "GitHub Achievements - testuser" in html
+    assert "Last updated: 2026-01-02 03:04:05" in html
+    assert '<div class="stat-value">17</div>' in html
+
+
+def test_write_page_skips_unchanged_stats(tmp_path):
+    stats = {"user": "testuser", "updated": "2026-01-02T03:04:05", "merged_prs": 1, "coauthored_prs": 0,
+             "total_stars": 0, "public_repos": 0, "followers": 0, "following": 0}
+    manifest = {}
+    assert gsp.write_page(tmp_path, "index.html", stats, manifest)
+    html = (tmp_path / "index.html").read_bytes()
+    assert gzip.decompress((tmp_path / "index.html.gz").read_bytes()) == html
+
+    assert not gsp.write_page(tmp_path, "index.html", {**stats, "updated": "2026-02-01T00:00:00"}, manifest)
+    assert (tmp_path / "index.html").read_bytes() == html
+    assert gsp.write_page(tmp_path, "index.html", {**stats, "merged_prs": 2}, manifest)
+
+
+def test_write_page_tracks_rendered_output(tmp_path, monkeypatch):
+    stats = {"user": "testuser", "updated": "2026-01-02T03:04:05", "merged_prs": 1, "coauthored_prs": 0,
+             "total_stars": 0, "public_repos": 0, "followers": 0, "following": 0}
+    manifest = {}
+    gsp.write_page(tmp_path, "index.html", stats, manifest)
+    # A stale copy (e.g. from a fresh checkout) is replaced without counting as a change.
+    (tmp_path / "index.html").write_text("old")
+    assert not gsp.write_page(tmp_path, "index.html", stats, manifest)
+    assert (tmp_path / "index.html").read_text() != "old"
+    # A template change alone is a change.
+    monkeypatch.setattr(gsp, "stale_note", lambda stats: " &middot; new footer")
+    assert gsp.write_page(tmp_path, "index.html", stats, manifest)
+
+
+def test_main_rebuilds_only_changed_users(temp_config_dir, tmp_path, capsys, monkeypatch):
+    store = ea.SnapshotStore()
+    store.record("alice", {"merged_prs": 1}, ts=1000)
+    store.record("bob", {"merged_prs": 2}, ts=1000)
+    store.close()
+    users = tmp_path / "users.txt"
+    users.write_text("alice\nbob\n")
+    out = tmp_path / "site"
+    argv = ["--from-history", "--users-file", str(users), "--output-dir", str(out)]
+
+    github_output = tmp_path / "github-output"
+    monkeypatch.setenv("GITHUB_OUTPUT", str(github_output))
+    gsp.main(argv)
+    assert (out / "users" / "alice.html.gz").exists()
+    assert (tmp_path / ".cache" / "stats-page-manifest.json").exists()
+    assert not list(out.glob(".*"))
+    assert "2 of 2 page(s) rebuilt" in capsys.readouterr().out
+    assert github_output.read_text() == "changed=true\n"
+
+    store = ea.SnapshotStore()
+    store.record("bob", {"merged_prs": 3}, ts=2000)
+    store.close()
+    gsp.main(argv)
+    output = capsys.readouterr().out
+    assert "Unchanged {}".format(out / "users" / "alice.html") in output
+    assert "1 of 2 page(s) rebuilt" in output
+
+
+def test_write_leaderboard_shards(temp_config_dir, tmp_path):
+    all_stats = [{"user": f"u{i}", "merged_prs": i, "total_stars": "N/A" if i == 3 else 10 - i} for i in range(5)]
+    written = gsp.write_leaderboard(tmp_path, all_stats, page_size=2)
+    lb = tmp_path / "leaderboard"
+    index = json.loads((lb / "index.json").read_text())
+    assert index["total"] == 5
+    assert index["pages"]["merged_prs"] == 3
+    first = json.loads((lb / "merged_prs" / "0.json").read_text())
+    assert [row[0] for row in first["rows"]] == ["u4", "u3"]
+    last = json.loads((lb / "total_stars" / "2.json").read_text())
+    assert last["offset"] == 4 and last["rows"][0][0] == "u3"
+    assert (lb / "index.html.gz").exists()
+
+    assert gsp.write_leaderboard(tmp_path, all_stats, page_size=2) == 0
+    assert written > 0
+    gsp.write_leaderboard(tmp_path, all_stats[:2], page_size=2)
+    assert not (lb / "merged_prs" / "1.json").exists()
+    assert not (lb / "merged_prs" / "1.json.gz").exists()
+
+
+def test_replayed_page_is_byte_identical(temp_config_dir, tmp_path):
+    def fake(args):
+        if args == ["api", "user"]:
+            return {"login": "testuser"}
+        if args[1] == "graphql":
+            raise RuntimeError("INSUFFICIENT_SCOPES")
+        if args[1] == "/users/testuser":
+            return {"public_repos": 3, "followers": 4, "following": 5}
+        if args[1].startswith("/users/testuser/repos"):
+            return [{"stargazers_count": 6, "visibility": "public"}]
+        return {"total_count": 2}
+
+    cassette = tmp_path / "cassette"
+    with patch("earn_achievements._gh_json_traced", side_effect=fake):
+        gsp.main(["--record", str(cassette), "--output-dir", str(tmp_path / "live")])
+    with patch("earn_achievements._gh_json_traced", side_effect=AssertionError("network")):
+        gsp.main(["--replay", str(cassette), "--output-dir", str(tmp_path / "replay")])
+    live = (tmp_path / "live" / "index.html").read_bytes()
+    assert b'<div class="stat-value">4</div>' in live
+    assert (tmp_path / "replay" / "index.html").read_bytes() == live
+
+
+def test_failed_metrics_served_stale_on_page(temp_config_dir):
+    ea.LastGoodStore("testuser").update({"followers": 9, "total_stars": 6})
+
+    def fake(args):
+        if args == ["api", "user"]:
+            return {"login": "testuser"}
+        raise RuntimeError("HTTP 502")
+
+    with patch("earn_achievements.gh_json", side_effect=fake):
+        stats = gsp.get_stats()
+    assert stats["followers"] == 9
+    assert stats["merged_prs"] == "N/A"
+    assert stats["stale"] == {"followers": "1m", "total_stars": "1m"}
+    html = gsp.generate_html(stats)
+    assert "showing last known: Total Stars (1m old), Followers (1m old)" in html
+    assert "followers" not in gsp.fresh_stats(stats)
+
+
+def test_failed_run_keeps_published_page(temp_config_dir, tmp_path):
+    (tmp_path / "index.html").write_text("published")
+    with patch("generate_stats_page.current_login", side_effect=RuntimeError("network down")):
+        gsp.main(["--output-dir", str(tmp_path)])
+    assert (tmp_path / "index.html").read_text() == "published"